@@ -0,0 +1,6 @@
+"""
+Headless JSON API over the service layer, for mobile clients and scripts.
+
+api.app holds the routes and handlers, api.server serves them over HTTP
+(python -m api.server) and api.client calls them in-process.
+"""
@@ -0,0 +1,295 @@
+"""
+Transport-independent core of the JSON API.
+
+handle(Request) -> Response authenticates the caller (HTTP Basic, or a
+Bearer token from POST /session so polling clients skip the password
+hash on every call), routes
+to a handler wrapping the service functions, serializes the result and
+answers conditional GETs with 304 when If-None-Match matches the ETag.
+The ETag is a hash of the response body, so it stays correct whichever
+process wrote the data; a polling client re-downloads nothing until the
+data actually changes.
+
+    GET  /goals                      goal -> sub-goal tree
+    GET  /checkins?date=YYYY-MM-DD   that day's statuses (default today)
+    POST /checkins                   {"statuses": {sub_goal_id: 0|1}} for today
+    GET  /todos/week?start=...       7 days of to-dos from start (default today)
+    GET  /progress                   Progress page summary (overall scope)
+    POST /batch                      {"requests": [{"method", "path", "body", "etag"}]}
+    POST /session                    {"token": ..., "expires_in": seconds}
+    DELETE /session                  revokes the Bearer token the call was made with
+"""
+import base64
+import hashlib
+import json
+from collections import namedtuple
+from datetime import date, timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+from auth.auth_service import authenticate
+from auth.credentials import issue_token, login_locked, resolve_token, revoke_token
+from checkin.checkin_service import get_statuses, set_statuses
+from config import SESSION_TOKEN_TTL
+from goals.goals_service import get_goals
+from todo.todo_service import get_tasks_range
+
+Request = namedtuple("Request", "method target headers body")
+
+MAX_BATCH = 50
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    REASONS = {
+        200: "OK", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized",
+        403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+        413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error",
+    }
+
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    @property
+    def reason(self):
+        return self.REASONS.get(self.status, "")
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+def _dumps(value):
+    # numpy scalars from the analytics layer serialize as plain numbers
+    return json.dumps(
+        value, separators=(",", ":"), default=lambda o: o.item()
+    ).encode()
+
+
+def _etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _day(value):
+    if value is None:
+        return date.today()
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"invalid date: {value!r}")
+
+
+# =====================================================
+# HANDLERS
+# =====================================================
+def goal_tree(user_id, query, body):
+    return [
+        {
+            "id": goal.id,
+            "name": goal.name,
+            "subs": [{"id": sub.id, "name": sub.name} for sub in subs],
+        }
+        for goal, subs in get_goals(user_id)
+    ]
+
+
+def day_statuses(user_id, query, body):
+    day = _day(query.get("date"))
+    statuses = get_statuses(user_id, day)
+    return {
+        "date": day.isoformat(),
+        "statuses": {str(sub_id): done for sub_id, done in sorted(statuses.items())},
+    }
+
+
+def bulk_checkin(user_id, query, body):
+    if not isinstance(body, dict) or not isinstance(body.get("statuses"), dict):
+        raise ApiError(400, 'expected {"statuses": {sub_goal_id: 0|1}}')
+
+    # Like the Check-in page, only today's progress can be changed.
+    day = _day(body.get("date"))
+    if day != date.today():
+        raise ApiError(400, "only today's check-ins can be changed")
+    try:
+        statuses = {int(k): int(v) for k, v in body["statuses"].items()}
+    except (TypeError, ValueError):
+        raise ApiError(400, "statuses must map sub-goal ids to 0 or 1")
+    if any(v not in (0, 1) for v in statuses.values()):
+        raise ApiError(400, "statuses must map sub-goal ids to 0 or 1")
+
+    owned = {sub.id for _, subs in get_goals(user_id) for sub in subs}
+    if not statuses.keys() <= owned:
+        raise ApiError(403, "unknown sub-goal")
+
+    set_statuses(user_id, day, statuses)
+    return day_statuses(user_id, {"date": day.isoformat()}, None)
+
+
+def week_todos(user_id, query, body):
+    start = _day(query.get("start"))
+    week = get_tasks_range(user_id, start, start + timedelta(days=6))
+    return {
+        "start": start.isoformat(),
+        "days": {
+            day: {
+                "tasks": [
+                    {"id": t_id, "task": task, "completed": completed}
+                    for t_id, task, completed in tasks.tasks
+                ],
+                "done": tasks.done,
+                "total": tasks.total,
+            }
+            for day, tasks in week.items()
+        },
+    }
+
+
+def progress_summary(user_id, query, body):
+    # Imported here so the API only loads pandas when progress is asked for.
+    from progress.analytics import get_stage
+    from progress.backends import OVERALL, get_backend
+
+    backend = get_backend(user_id)
+    days = backend.metric("active_days", OVERALL)
+    perfect, logged = backend.metric("perfect_days", OVERALL)
+    momentum_7, _, risk = backend.insights(OVERALL)
+
+    return {
+        "active_days": days,
+        "stage": get_stage(days),
+        "completion_rate": backend.metric("completion_rate", OVERALL),
+        "goal_scores": backend.metric("goal_scores", OVERALL),
+        "habit_scores": backend.metric("habit_scores", OVERALL),
+        "streaks": {
+            name: {"current": current, "best": best}
+            for name, (current, best) in backend.metric("habit_streaks", OVERALL).items()
+        },
+        "perfect_days": {"perfect": perfect, "days": logged},
+        "trend": backend.metric("consistency_trend", OVERALL),
+        "momentum_7": momentum_7,
+        "risk": risk,
+    }
+
+
+def new_session(user_id, query, body):
+    return {"token": issue_token(user_id), "expires_in": SESSION_TOKEN_TTL}
+
+
+def end_session(headers):
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer":
+        raise ApiError(400, "DELETE /session needs the Bearer token to revoke")
+    revoke_token(token.strip())
+    return {"revoked": True}
+
+
+ROUTES = {
+    ("GET", "/goals"): goal_tree,
+    ("GET", "/checkins"): day_statuses,
+    ("POST", "/checkins"): bulk_checkin,
+    ("GET", "/todos/week"): week_todos,
+    ("GET", "/progress"): progress_summary,
+    ("POST", "/session"): new_session,
+}
+
+
+# =====================================================
+# DISPATCH
+# =====================================================
+def _user(headers):
+    scheme, _, credentials = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer":
+        user_id = resolve_token(credentials.strip())
+        if user_id:
+            return user_id
+    elif scheme.lower() == "basic":
+        try:
+            username, _, password = base64.b64decode(credentials).decode().partition(":")
+        except ValueError:             # binascii.Error, non-ASCII input, bad UTF-8
+            username = password = None
+        if username and login_locked(username):
+            raise ApiError(429, "too many failed logins")
+        user_id = username and authenticate(username, password)
+        if user_id:
+            return user_id
+    raise ApiError(401, "authentication required")
+
+
+def _call(user_id, method, target, body, etag):
+    """One routed call -> (status, payload bytes, etag)."""
+    url = urlsplit(target)
+    handler = ROUTES.get((method, url.path))
+    if handler is None:
+        known = any(path == url.path for _, path in ROUTES)
+        raise ApiError(405 if known else 404, f"no route for {method} {url.path}")
+
+    payload = _dumps(handler(user_id, dict(parse_qsl(url.query)), body))
+    tag = _etag(payload)
+    if method == "GET" and etag == tag:
+        return 304, b"", tag
+    return 200, payload, tag
+
+
+def _batch(user_id, body):
+    calls = body.get("requests") if isinstance(body, dict) else None
+    if not isinstance(calls, list) or len(calls) > MAX_BATCH:
+        raise ApiError(400, f'expected {{"requests": [...]}} with at most {MAX_BATCH} calls')
+
+    results = []
+    for call in calls:
+        try:
+            status, payload, tag = _call(
+                user_id, call.get("method", "GET").upper(), call["path"],
+                call.get("body"), call.get("etag")
+            )
+            results.append({
+                "status": status,
+                "etag": tag,
+                "body": json.loads(payload) if payload else None,
+            })
+        except ApiError as e:
+            results.append({"status": e.status, "error": str(e)})
+        except (AttributeError, KeyError, TypeError):
+            results.append({"status": 400, "error": "malformed batch entry"})
+    return {"responses": results}
+
+
+def _error(status, message):
+    return Response(status, _dumps({"error": message}), {"Content-Type": "application/json"})
+
+
+def handle(request):
+    headers = {k.lower(): v for k, v in request.headers.items()}
+    try:
+        user_id = _user(headers)
+
+        body = None
+        if request.body:
+            try:
+                body = json.loads(request.body)
+            except ValueError:
+                raise ApiError(400, "body is not valid JSON")
+
+        if request.method == "POST" and urlsplit(request.target).path == "/batch":
+            return Response(200, _dumps(_batch(user_id, body)), {"Content-Type": "application/json"})
+        if request.method == "DELETE" and urlsplit(request.target).path == "/session":
+            return Response(200, _dumps(end_session(headers)), {"Content-Type": "application/json"})
+
+        status, payload, tag = _call(
+            user_id, request.method, request.target, body, headers.get("if-none-match")
+        )
+    except ApiError as e:
+        response = _error(e.status, str(e))
+        if e.status == 401:
+            response.headers["WWW-Authenticate"] = 'Basic realm="habits"'
+        return response
+
+    response_headers = {"ETag": tag}
+    if payload:
+        response_headers["Content-Type"] = "application/json"
+    return Response(status, payload, response_headers)
@@ -0,0 +1,63 @@
+"""
+In-process API client: calls api.app.handle directly, no sockets.
+
+    client = Client("demo", "test123")
+    client.login()                                      # optional: Bearer token
+    client.logout()                                     # revokes it
+    goals = client.get("/goals").json()
+    client.get("/goals", etag=previous_etag).status     # 304 if unchanged
+
+Remembers the last ETag per path when poll() is used, like a polling
+mobile client would.
+"""
+import base64
+import json
+
+from api.app import Request, handle
+
+
+class Client:
+    def __init__(self, username, password):
+        token = base64.b64encode(f"{username}:{password}".encode()).decode()
+        self.headers = {"Authorization": f"Basic {token}"}
+        self.etags = {}
+
+    def login(self):
+        """Swap Basic credentials for a session token."""
+        response = self.post("/session", {})
+        if response.status == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+        return response
+
+    def logout(self):
+        """Revoke the session token from login()."""
+        return self.request("DELETE", "/session")
+
+    def request(self, method, path, body=None, etag=None):
+        headers = dict(self.headers)
+        if etag:
+            headers["If-None-Match"] = etag
+        payload = json.dumps(body).encode() if body is not None else b""
+        return handle(Request(method, path, headers, payload))
+
+    def get(self, path, etag=None):
+        return self.request("GET", path, etag=etag)
+
+    def post(self, path, body):
+        return self.request("POST", path, body)
+
+    def poll(self, path):
+        """GET with the ETag from the previous poll of the same path."""
+        response = self.get(path, self.etags.get(path))
+        if "ETag" in response.headers:
+            self.etags[path] = response.headers["ETag"]
+        return response
+
+    def batch(self, *calls):
+        """calls: (method, path) or (method, path, body) tuples."""
+        return self.post("/batch", {
+            "requests": [
+                {"method": c[0], "path": c[1], "body": c[2] if len(c) > 2 else None}
+                for c in calls
+            ]
+        })
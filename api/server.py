@@ -0,0 +1,108 @@
+"""
+asyncio HTTP/1.1 front end for api.app.
+
+    python -m api.server [--host 127.0.0.1] [--port 8765]
+
+The event loop only parses requests and writes responses (keep-alive
+supported); api.app.handle, which does all SQLite and pandas work, runs
+on a thread pool the size of the connection pool.
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from api.app import Request, _error, handle
+from config import API_HOST, API_PORT, DB_POOL_SIZE
+
+MAX_BODY = 1024 * 1024
+
+
+def _encode(response, keep_alive):
+    head = [f"HTTP/1.1 {response.status} {response.reason}"]
+    head += [f"{name}: {value}" for name, value in response.headers.items()]
+    head.append(f"Content-Length: {len(response.body)}")
+    head.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body
+
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, version = line.decode("latin-1").split()
+
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY:
+        raise OverflowError
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target, headers, body), version
+
+
+def _safe_handle(request):
+    try:
+        return handle(request)
+    except Exception:
+        return _error(500, "internal error")
+
+
+class Server:
+    def __init__(self, host=API_HOST, port=API_PORT, workers=DB_POOL_SIZE):
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="api")
+
+    async def _client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    parsed = await _read_request(reader)
+                except OverflowError:
+                    writer.write(_encode(_error(413, "body too large"), False))
+                    break
+                if parsed is None:
+                    break
+
+                request, version = parsed
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and request.headers.get("connection", "").lower() != "close"
+                )
+                response = await loop.run_in_executor(self.executor, _safe_handle, request)
+                writer.write(_encode(response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        server = await asyncio.start_server(self._client, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    from database.schema import ensure_schema
+
+    parser = argparse.ArgumentParser(description="Habit tracker JSON API")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+
+    ensure_schema()
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(Server(args.host, args.port).serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,55 @@
+from auth.credentials import (
+    clear_failures,
+    dummy_verify,
+    hash_password,
+    login_locked,
+    record_failure,
+    verify_password,
+)
+from database.db import get_connection
+
+
+def authenticate(username, password):
+    """
+    The user's id if the credentials match, else None (also while the
+    username is locked out). Legacy plaintext or outdated hashes are
+    rehashed on a successful login.
+    """
+    if login_locked(username):
+        return None
+
+    with get_connection() as conn:
+        user = conn.execute(
+            "SELECT id, password FROM users WHERE username=?", (username,)
+        ).fetchone()
+
+    if user is None or user[1] is None:
+        dummy_verify(password)
+        record_failure(username)
+        return None
+
+    user_id, stored = user
+    matches, needs_rehash = verify_password(password, stored)
+    if not matches:
+        record_failure(username)
+        return None
+
+    clear_failures(username)
+    if needs_rehash:
+        with get_connection() as conn:
+            # Only replace the value we verified (another login may have won).
+            conn.execute(
+                "UPDATE users SET password=? WHERE id=? AND password=?",
+                (hash_password(password), user_id, stored)
+            )
+            conn.commit()
+    return user_id
+
+
+def set_password(user_id, password):
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE users SET password=? WHERE id=?",
+            (hash_password(password), user_id)
+        )
+        conn.commit()
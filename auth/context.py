@@ -0,0 +1,82 @@
+"""
+Per-session user context.
+
+Holds what most pages read on every rerun: the goal tree, the user's
+completion milestones, today's statuses and this week's to-dos. Built
+once at login (utils.session.user_context) and kept in session state.
+Each part is keyed on the user's data versions and the day, so it is
+reloaded only after a write that affects it (or at midnight), from
+this process or any other. The versions are read once per refresh()
+(each user_context() call, i.e. once per rerun), so a rerun that
+changes nothing costs one primary-key lookup.
+"""
+from datetime import date, timedelta
+
+from checkin.checkin_service import get_milestones, get_statuses
+from goals.goals_service import get_goals
+from todo.todo_service import get_tasks_range
+from utils.versions import read
+
+
+class UserContext:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.versions = {}      # versions.read() as of the last refresh()
+        self._parts = {}        # name -> (key, value)
+
+    def refresh(self):
+        """Re-read the user's data versions; parts reload on next use if they moved."""
+        self.versions = read(self.user_id)
+        return self
+
+    def _version(self, *domains):
+        return tuple(self.versions[domain] for domain in domains)
+
+    def _part(self, name, key, load):
+        cached = self._parts.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        # Key taken before loading: a write racing the load re-keys it.
+        value = load()
+        self._parts[name] = (key, value)
+        return value
+
+    @property
+    def goals(self):
+        """get_goals() for the user."""
+        return self._part(
+            "goals", self._version("goals"),
+            lambda: get_goals(self.user_id)
+        )
+
+    @property
+    def milestones(self):
+        """get_milestones(): first/last completed day and total."""
+        return self._part(
+            "milestones", self._version("goals", "checkins"),
+            lambda: get_milestones(self.user_id)
+        )
+
+    @property
+    def statuses(self):
+        """Today's {sub_goal_id: completed}."""
+        today = date.today()
+        return self._part(
+            "statuses", (today, self._version("goals", "checkins")),
+            lambda: get_statuses(self.user_id, today)
+        )
+
+    @property
+    def week(self):
+        """get_tasks_range() for today and the next six days."""
+        today = date.today()
+        return self._part(
+            "week", (today, self._version("todos")),
+            lambda: get_tasks_range(self.user_id, today, today + timedelta(days=6))
+        )
+
+    def load(self):
+        """Fill every part now (login) instead of on first use."""
+        self.refresh()
+        self.goals, self.milestones, self.statuses, self.week
+        return self
@@ -0,0 +1,210 @@
+"""
+Password hashing, login rate limiting and session tokens.
+
+Hashes are stored as self-describing strings so the cost can be tuned
+in config without invalidating existing rows:
+
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+
+Anything else in users.password is a legacy plaintext row. Schema
+migration 9 hashes all of them once; one written later still verifies,
+at the cost of a dummy hash so its timing matches a real check, and is
+reported as needing a rehash, which the login path does transparently. Failed attempts are counted per username
+in memory, and verified logins get a random token that resolves to the
+user id until it expires or is revoked at logout, so API clients skip
+the hash and app sessions can be ended server-side.
+"""
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+
+from config import (
+    LOGIN_LOCKOUT_SECONDS,
+    LOGIN_MAX_FAILURES,
+    LOGIN_TRACKED_USERNAMES,
+    PASSWORD_SCHEME,
+    PBKDF2_ITERATIONS,
+    SCRYPT_N,
+    SCRYPT_P,
+    SCRYPT_R,
+    SESSION_TOKEN_TTL,
+)
+
+
+HASH_PREFIXES = ("scrypt$", "pbkdf2_sha256$")
+
+
+def is_hashed(stored):
+    return stored.startswith(HASH_PREFIXES)
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode()
+
+
+def _unb64(text):
+    return base64.b64decode(text.encode())
+
+
+# =====================================================
+# HASHING
+# =====================================================
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=128 * n * r * p + 1024 * 1024, dklen=32
+    )
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+def hash_password(password, scheme=PASSWORD_SCHEME):
+    salt = secrets.token_bytes(16)
+    if scheme == "scrypt":
+        digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+    if scheme == "pbkdf2_sha256":
+        digest = _pbkdf2(password, salt, PBKDF2_ITERATIONS)
+        return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(digest)}"
+    raise ValueError(f"unknown password scheme: {scheme}")
+
+
+def _current_params(stored):
+    if PASSWORD_SCHEME == "scrypt":
+        return stored.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+    return stored.startswith(f"pbkdf2_sha256${PBKDF2_ITERATIONS}$")
+
+
+def verify_password(password, stored):
+    """(matches, needs_rehash) for a stored hash or legacy plaintext."""
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = map(int, parts[1:4])
+            digest = _scrypt(password, _unb64(parts[4]), n, r, p)
+        elif parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            digest = _pbkdf2(password, _unb64(parts[2]), int(parts[1]))
+        else:
+            dummy_verify(password)
+            return hmac.compare_digest(password.encode(), stored.encode()), True
+    except ValueError:
+        return False, False
+
+    matches = hmac.compare_digest(digest, _unb64(parts[-1]))
+    return matches, matches and not _current_params(stored)
+
+
+_dummy = None
+
+
+def dummy_verify(password):
+    """Spend the same time as a real check (unknown usernames)."""
+    global _dummy
+    if _dummy is None:
+        _dummy = hash_password(secrets.token_urlsafe(16))
+    verify_password(password, _dummy)
+
+
+# =====================================================
+# RATE LIMITING
+# =====================================================
+_lock = threading.Lock()
+_failures = OrderedDict()               # username -> failure timestamps, oldest first
+
+
+def _recent(username, now):
+    """Failures still inside the lockout window; drops the entry once none are."""
+    attempts = _failures.get(username)
+    if attempts is None:
+        return ()
+    while attempts and attempts[0] <= now - LOGIN_LOCKOUT_SECONDS:
+        attempts.popleft()
+    if not attempts:
+        del _failures[username]
+    return attempts
+
+
+def login_locked(username):
+    with _lock:
+        return len(_recent(username, time.monotonic())) >= LOGIN_MAX_FAILURES
+
+
+def record_failure(username):
+    now = time.monotonic()
+    with _lock:
+        _recent(username, now)
+        _failures.setdefault(username, deque()).append(now)
+        _failures.move_to_end(username)
+        # Bounded under username spraying: forget the longest-idle names.
+        while len(_failures) > LOGIN_TRACKED_USERNAMES:
+            _failures.popitem(last=False)
+
+
+def clear_failures(username):
+    with _lock:
+        _failures.pop(username, None)
+
+
+# =====================================================
+# SESSION TOKENS
+# =====================================================
+# token -> (user_id, expires). Every token lives SESSION_TOKEN_TTL, so
+# insertion order is expiry order: expired tokens are always at the front.
+_tokens = OrderedDict()
+
+
+def _expire(now):
+    """Drop expired tokens from the front; O(1) per expired token."""
+    while _tokens:
+        token, (_, expires) = next(iter(_tokens.items()))
+        if expires > now:
+            return
+        del _tokens[token]
+
+
+def _issue(user_id, now):
+    token = secrets.token_urlsafe(32)
+    _tokens[token] = (user_id, now + SESSION_TOKEN_TTL)
+    return token
+
+
+def issue_token(user_id):
+    now = time.monotonic()
+    with _lock:
+        _expire(now)
+        return _issue(user_id, now)
+
+
+def resolve_token(token):
+    """The user id a live token was issued to, else None."""
+    with _lock:
+        entry = _tokens.get(token)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del _tokens[token]
+            return None
+        return entry[0]
+
+
+def rotate_token(token):
+    """Swap a live token for a fresh one (new expiry), else None."""
+    now = time.monotonic()
+    with _lock:
+        _expire(now)
+        entry = _tokens.pop(token, None)
+        if entry is None:
+            return None
+        return _issue(entry[0], now)
+
+
+def revoke_token(token):
+    with _lock:
+        _tokens.pop(token, None)
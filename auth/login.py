@@ -1,5 +1,7 @@
 import streamlit as st
-from database.db import get_connection
+from auth.auth_service import authenticate
+from auth.credentials import issue_token, login_locked
+from utils.session import user_context
 
 def render():
     st.title("Login")
@@ -8,15 +10,18 @@ def render():
     password = st.text_input("Password", type="password")
 
     if st.button("Login"):
-        conn = get_connection()
-        cur = conn.cursor()
-        user = cur.execute(
-            "SELECT id FROM users WHERE username=? AND password=?",
-            (username, password)
-        ).fetchone()
+        if login_locked(username):
+            st.error("Too many failed attempts. Try again in a few minutes.")
+            return
 
-        if user:
-            st.session_state.user_id = user[0]
+        user_id = authenticate(username, password)
+
+        if user_id:
+            st.session_state.user_id = user_id
+            # Server-side handle on the session: rotated every rerun and
+            # revoked at logout (streamlit_app.py). Never put in the URL.
+            st.session_state.token = issue_token(user_id)
+            user_context()
             st.rerun()
         else:
             st.error("Invalid credentials")
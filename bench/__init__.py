@@ -0,0 +1,7 @@
+"""
+Benchmarks for the habit tracker's hot paths.
+
+    python -m bench             # full suite on generated data, JSON report
+    python -m bench.generate    # synthetic database only
+    python -m bench.<name>      # focused micro-benchmarks
+"""
@@ -0,0 +1,166 @@
+"""
+Benchmark suite for the service and analytics hot paths.
+
+    python -m bench [--users 10 --goals 3 --subs 4 --days 365 --todos 30]
+                    [--rounds 20] [--db bench.db] [--json report.json]
+                    [--compare old.json]
+
+Generates a synthetic database (bench/generate.py), times every scenario
+for `rounds` rounds (cycling through the users) and writes a JSON report
+in the pytest-benchmark layout (commit, machine, params, per-benchmark
+min/max/mean/median/stddev) so runs can be compared across commits.
+--compare prints the median ratio against an earlier report.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from bench.generate import add_arguments, generate, sizes
+from checkin.checkin_service import get_milestones, set_status
+from goals.goals_service import get_goals
+from progress import analytics
+from todo.todo_service import get_tasks, get_tasks_range
+
+FRAME_METRICS = [
+    "active_days",
+    "completion_rate",
+    "daily_completion",
+    "goal_contribution",
+    "goal_scores",
+    "habit_scores",
+    "habit_streaks",
+    "risk_signal",
+    "consistency_trend",
+    "fragile_habit",
+    "perfect_days",
+    "weekday_pattern",
+]
+
+
+# =====================================================
+# SCENARIOS
+# =====================================================
+def scenarios(user_ids):
+    """(group, name, fn(user_id)) for every benchmark."""
+    today = date.today()
+    week = [(today + timedelta(days=i)).isoformat() for i in range(7)]
+    frames = {u: analytics.load_data(u) for u in user_ids}
+    subs = {u: get_goals(u)[0].subs[0].id for u in user_ids}
+    flips = {}
+
+    def toggle(user_id):
+        flips[user_id] = 1 - flips.get(user_id, 0)
+        set_status(subs[user_id], today, flips[user_id])
+
+    yield "goals", "get_goals", get_goals
+
+    yield "analytics", "load_data", analytics.load_data
+    yield "analytics", "load_daily", analytics.load_daily
+    yield "analytics", "load_daily(last=21)", lambda u: analytics.load_daily(u, last=21)
+    for name in FRAME_METRICS:
+        yield "analytics", name, lambda u, f=getattr(analytics, name): f(frames[u])
+    yield "analytics", "momentum", lambda u: analytics.momentum(frames[u], 7)
+    yield "checkin", "get_milestones", get_milestones
+
+    yield "todo", "get_tasks x7", lambda u: [get_tasks(u, day) for day in week]
+    yield "todo", "get_tasks_range(week)", lambda u: get_tasks_range(u, week[0], week[-1])
+
+    yield "checkin", "set_status toggle", toggle
+
+
+def measure(fn, user_ids, rounds):
+    fn(user_ids[0])                                 # warm-up
+    times = []
+    for i in range(rounds):
+        user_id = user_ids[i % len(user_ids)]
+        start = time.perf_counter()
+        fn(user_id)
+        times.append(time.perf_counter() - start)
+
+    return {
+        "min": min(times),
+        "max": max(times),
+        "mean": statistics.fmean(times),
+        "median": statistics.median(times),
+        "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "rounds": rounds,
+    }
+
+
+# =====================================================
+# REPORT
+# =====================================================
+def commit_info():
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {"id": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"id": None, "dirty": None}
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "sqlite": sqlite3.sqlite_version,
+    }
+
+
+def run(args):
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="habits-bench-"), "bench.db")
+    counts = generate(path, **sizes(args))
+    user_ids = list(range(1, args.users + 1))
+
+    benchmarks = []
+    for group, name, fn in scenarios(user_ids):
+        stats = measure(fn, user_ids, args.rounds)
+        benchmarks.append({"group": group, "name": name, "stats": stats})
+        print(f"{group:>10}  {name:<28} median {stats['median'] * 1000:9.3f} ms")
+
+    return {
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "commit_info": commit_info(),
+        "machine_info": machine_info(),
+        "params": {**sizes(args), "rounds": args.rounds, "rows": counts},
+        "benchmarks": benchmarks,
+    }
+
+
+def compare(report, old):
+    before = {(b["group"], b["name"]): b["stats"]["median"] for b in old["benchmarks"]}
+    print(f"\nvs {old['commit_info']['id'] or 'previous run'} (median, new/old):")
+    for bench in report["benchmarks"]:
+        key = (bench["group"], bench["name"])
+        if key in before and before[key]:
+            print(f"{key[0]:>10}  {key[1]:<28} {bench['stats']['median'] / before[key]:6.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--db", help="database file to generate (default: a temp file)")
+    parser.add_argument("--json", default="bench-report.json", help="report path")
+    parser.add_argument("--compare", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.json, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nreport written to {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
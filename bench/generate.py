@@ -0,0 +1,119 @@
+"""
+Synthetic data generator for benchmarks.
+
+    python -m bench.generate bench.db [--users 10] [--goals 3] [--subs 4]
+                                      [--days 365] [--todos 30] [--seed 0]
+
+Creates (or replaces) a database with `users` users named bench_0000...,
+each with `goals` goals of `subs` sub-goals, `days` days of check-ins
+ending today and `todos` to-dos spread over the same range plus the
+coming week. Everything is inserted with executemany in one transaction.
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+from database import db
+from database.schema import create_tables
+
+PASSWORD = "bench"
+
+
+def _logs(sub_ids, days, rng):
+    start = date.today() - timedelta(days=days - 1)
+    keys = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    for sub_id in sub_ids:
+        # Each habit gets its own completion rate so streaks vary
+        rate = rng.uniform(0.3, 0.95)
+        for day in keys:
+            yield sub_id, day, int(rng.random() < rate)
+
+
+def _todos(user_ids, todos, days, rng):
+    today = date.today()
+    for user_id in user_ids:
+        for i in range(todos):
+            due = today + timedelta(days=rng.randint(-days + 1, 6))
+            done = int(rng.random() < (0.8 if due < today else 0.3))
+            yield user_id, f"task {i}", due.isoformat(), done
+
+
+def generate(path, users=10, goals=3, subs=4, days=365, todos=30, seed=0):
+    """Build the database at `path`; returns row counts per table."""
+    rng = random.Random(seed)
+    for stale in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    db.use_database(path)
+    create_tables()
+
+    with db.get_connection() as conn:
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO users (id, username, password) VALUES (?, ?, ?)",
+            [(u + 1, f"bench_{u:04d}", PASSWORD) for u in range(users)]
+        )
+        user_ids = range(1, users + 1)
+
+        conn.executemany(
+            "INSERT INTO goals (id, user_id, name) VALUES (?, ?, ?)",
+            [
+                (u * goals + g + 1, u + 1, f"Goal {g}")
+                for u in range(users) for g in range(goals)
+            ]
+        )
+        conn.executemany(
+            "INSERT INTO sub_goals (id, goal_id, name) VALUES (?, ?, ?)",
+            [
+                (g * subs + s + 1, g + 1, f"Habit {g % goals}.{s}")
+                for g in range(users * goals) for s in range(subs)
+            ]
+        )
+        sub_ids = range(1, users * goals * subs + 1)
+
+        conn.executemany(
+            "INSERT INTO daily_logs (sub_goal_id, date, completed) VALUES (?, ?, ?)",
+            _logs(sub_ids, days, rng)
+        )
+        conn.executemany(
+            "INSERT INTO todos (user_id, task, due_date, completed) VALUES (?, ?, ?, ?)",
+            _todos(user_ids, todos, days, rng)
+        )
+        conn.commit()
+
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("users", "goals", "sub_goals", "daily_logs", "todos")
+        }
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--goals", type=int, default=3, help="goals per user")
+    parser.add_argument("--subs", type=int, default=4, help="sub-goals per goal")
+    parser.add_argument("--days", type=int, default=365, help="days of history")
+    parser.add_argument("--todos", type=int, default=30, help="to-dos per user")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def sizes(args):
+    return {
+        "users": args.users,
+        "goals": args.goals,
+        "subs": args.subs,
+        "days": args.days,
+        "todos": args.todos,
+        "seed": args.seed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    for table, count in generate(args.path, **sizes(args)).items():
+        print(f"{table:>10}: {count:,}")
@@ -0,0 +1,78 @@
+"""
+Login throughput at realistic hash costs.
+
+    python -m bench.login [--logins 50] [--threads 4]
+
+Times verify_password() for legacy plaintext rows, scrypt and PBKDF2 at
+the configured costs (config.SCRYPT_*, PBKDF2_ITERATIONS), single-threaded
+and across a thread pool (hashlib releases the GIL while hashing), then
+the full authenticate() path against a generated database and a session
+token lookup, which is what app reruns and API bearer calls cost instead.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from auth import credentials
+from auth.auth_service import authenticate, set_password
+from bench.generate import generate
+
+PASSWORD = "correct horse battery staple"
+
+
+def rate(fn, count, threads):
+    start = time.perf_counter()
+    if threads == 1:
+        for _ in range(count):
+            fn()
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            for future in [pool.submit(fn) for _ in range(count)]:
+                future.result()
+    elapsed = time.perf_counter() - start
+    return elapsed / count * 1000, count / elapsed
+
+
+def report(name, fn, count, threads):
+    for n in sorted({1, threads}):
+        ms, per_second = rate(fn, count, n)
+        print(f"{name:<28} {n:>2} thread(s)  {ms:9.3f} ms/login  {per_second:10.1f} logins/s")
+
+
+def main(logins, threads):
+    stored = {
+        "plaintext (legacy)": PASSWORD,
+        "scrypt": credentials.hash_password(PASSWORD, "scrypt"),
+        "pbkdf2_sha256": credentials.hash_password(PASSWORD, "pbkdf2_sha256"),
+    }
+    print(
+        f"scrypt n={credentials.SCRYPT_N} r={credentials.SCRYPT_R} p={credentials.SCRYPT_P}, "
+        f"pbkdf2 {credentials.PBKDF2_ITERATIONS:,} iterations\n"
+    )
+    for name, value in stored.items():
+        report(f"verify {name}", lambda v=value: credentials.verify_password(PASSWORD, v), logins, threads)
+
+    path = os.path.join(tempfile.mkdtemp(prefix="habits-login-"), "bench.db")
+    generate(path, users=threads, days=1, todos=0)
+    for user_id in range(1, threads + 1):
+        set_password(user_id, PASSWORD)
+
+    counter = iter(range(10 ** 9))
+    report(
+        "authenticate()",
+        lambda: authenticate(f"bench_{next(counter) % threads:04d}", PASSWORD),
+        logins, threads
+    )
+
+    token = credentials.issue_token(1)
+    report("session token", lambda: credentials.resolve_token(token), logins * 1000, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    main(args.logins, args.threads)
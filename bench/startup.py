@@ -0,0 +1,91 @@
+"""
+Cold-start and per-rerun cost of the login and To-Do paths.
+
+    python -m bench.startup [--rounds 20] [--app DIR]
+
+Each path runs in a fresh interpreter under Streamlit's AppTest against a
+small generated database: the first script run is the cold start (page
+imports, schema check), later reruns give the steady per-rerun overhead.
+Also lists which heavy libraries each path ended up importing. --app
+measures another checkout of the app (e.g. an older commit) the same way.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY = ("pandas", "numpy", "plotly.express")
+
+
+def _child(app, db_path, rounds):
+    sys.path.insert(0, app)
+    os.chdir(app)
+    from streamlit.testing.v1 import AppTest
+
+    from database import db
+    db.use_database(db_path)
+
+    at = AppTest.from_file(os.path.join(app, "streamlit_app.py"), default_timeout=60)
+
+    def timed_run(action):
+        start = time.perf_counter()
+        action()
+        return (time.perf_counter() - start) * 1000
+
+    def heavy():
+        return [name for name in HEAVY if name in sys.modules]
+
+    results = {}
+
+    cold = timed_run(at.run)
+    warm = [timed_run(at.run) for _ in range(rounds)]
+    results["login"] = {"cold_ms": cold, "rerun_ms": statistics.median(warm), "heavy": heavy()}
+
+    at.session_state["user_id"] = 1
+    try:
+        from auth.credentials import issue_token
+    except ImportError:             # --app checkouts from before session tokens
+        pass
+    else:
+        at.session_state["token"] = issue_token(1)
+    at.run()
+    cold = timed_run(lambda: at.sidebar.radio[0].set_value("To-Do").run())
+    warm = [timed_run(at.run) for _ in range(rounds)]
+    results["todo"] = {"cold_ms": cold, "rerun_ms": statistics.median(warm), "heavy": heavy()}
+
+    print(json.dumps(results))
+
+
+def measure(app, rounds):
+    from bench.generate import generate
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="habits-startup-"), "bench.db")
+    generate(db_path, users=1, days=90)
+
+    out = subprocess.run(
+        [sys.executable, "-m", "bench.startup", "--child", app, db_path, str(rounds)],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        _child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--app", default=os.getcwd(), help="app checkout to measure")
+    args = parser.parse_args()
+
+    for path, r in measure(os.path.abspath(args.app), args.rounds).items():
+        print(
+            f"{path:>6}  cold {r['cold_ms']:8.1f} ms   rerun {r['rerun_ms']:7.1f} ms   "
+            f"imports {', '.join(r['heavy']) or '-'}"
+        )
@@ -0,0 +1,67 @@
+"""
+Streak engine benchmark: vectorized habit_streaks vs the per-habit loop.
+
+    python -m bench.streaks [habits] [days]
+
+Defaults to 1,000 habits x 5 years of daily logs.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from progress.analytics import _streak_calc, habit_streaks
+
+
+def loop_streaks(df):
+    """The original implementation: one _streak_calc call per habit."""
+    out = {}
+    for h, hdf in df[df["completed"] == 1].groupby("sub_goal", observed=True):
+        dates = sorted(hdf["date"].dt.date.unique())
+        out[h] = _streak_calc(dates)
+    return out
+
+
+def make_logs(habits, days, seed=0):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2020-01-01")
+    dates = start + np.arange(days)
+
+    # Each habit gets its own completion rate so streak lengths vary
+    rates = rng.uniform(0.3, 0.95, habits)
+    completed = (rng.random((habits, days)) < rates[:, None]).astype(int)
+
+    return pd.DataFrame({
+        "date": pd.to_datetime(np.tile(dates, habits)),
+        "completed": completed.ravel(),
+        "goal": "bench",
+        "sub_goal": np.repeat([f"habit {i:04d}" for i in range(habits)], days),
+    })
+
+
+def best_of(fn, arg, rounds):
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        result = fn(arg)
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def main(habits=1000, days=5 * 365, rounds=3):
+    df = make_logs(habits, days)
+    print(f"{habits} habits x {days} days = {len(df):,} rows")
+
+    loop_t, expected = best_of(loop_streaks, df, rounds)
+    fast_t, actual = best_of(habit_streaks, df, rounds)
+
+    assert actual == expected, "vectorized streaks differ from _streak_calc"
+
+    print(f"loop:       {loop_t * 1000:9.1f} ms")
+    print(f"vectorized: {fast_t * 1000:9.1f} ms")
+    print(f"speedup:    {loop_t / fast_t:9.1f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
@@ -1,35 +1,130 @@
+from collections import namedtuple
+
+from config import WRITE_BEHIND
+from database import writer
 from database.db import get_connection
+from goals.goals_service import sub_goal_owner
+from utils.dates import to_key
 
-def set_status(sub_goal_id, date, completed):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        INSERT INTO daily_logs (sub_goal_id, date, completed)
-        VALUES (?, ?, ?)
-        ON CONFLICT(sub_goal_id, date)
-        DO UPDATE SET completed = excluded.completed
-        """,
-        (sub_goal_id, date, completed)
+UPSERT_LOG = """
+    INSERT INTO daily_logs (sub_goal_id, date, completed)
+    VALUES (?, ?, ?)
+    ON CONFLICT(sub_goal_id, date)
+    DO UPDATE SET completed = excluded.completed
+"""
+
+def _submit(user_id, sub_goal_id, day, completed):
+    writer.submit(
+        ("log", sub_goal_id, day), UPSERT_LOG, (sub_goal_id, day, completed),
+        user_id, "checkins"
     )
 
-    conn.commit()
+
+def set_status(sub_goal_id, date, completed):
+    day = to_key(date)
+    with get_connection() as conn:
+        if WRITE_BEHIND:
+            _submit(sub_goal_owner(conn, sub_goal_id), sub_goal_id, day, completed)
+            return
+        conn.execute(UPSERT_LOG, (sub_goal_id, day, completed))
+        conn.commit()
+
+
+def set_statuses(user_id, date, statuses):
+    """
+    Bulk upsert {sub_goal_id: completed} for one day in a single transaction.
+    """
+    if not statuses:
+        return
+
+    day = to_key(date)
+    if WRITE_BEHIND:
+        for sub_id, completed in statuses.items():
+            _submit(user_id, sub_id, day, completed)
+        return
+
+    with get_connection() as conn:
+        conn.executemany(
+            UPSERT_LOG,
+            [(sub_id, day, completed) for sub_id, completed in statuses.items()]
+        )
+        conn.commit()
 
 
 def get_status(sub_goal_id, date):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        SELECT completed
-        FROM daily_logs
-        WHERE sub_goal_id = ? AND date = ?
-        """,
-        (sub_goal_id, date)
-    )
+    day = to_key(date)
+    with get_connection() as conn:
+        if WRITE_BEHIND:
+            queued = writer.pending("log", sub_goal_owner(conn, sub_goal_id))
+            if (sub_goal_id, day) in queued:
+                return queued[(sub_goal_id, day)][2]
 
-    row = cur.fetchone()
+        cur = conn.cursor()
+
+        cur.execute(
+            """
+            SELECT completed
+            FROM daily_logs
+            WHERE sub_goal_id = ? AND date = ?
+            """,
+            (sub_goal_id, day)
+        )
+
+        row = cur.fetchone()
     return row[0] if row else None
 
+
+def get_statuses(user_id, date):
+    """
+    All of the user's logged statuses for one day as {sub_goal_id: completed}.
+    Sub-goals without a row for that day are simply absent.
+    """
+    day = to_key(date)
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT d.sub_goal_id, d.completed
+            FROM daily_logs d
+            JOIN sub_goals s ON d.sub_goal_id = s.id
+            JOIN goals g ON s.goal_id = g.id
+            WHERE g.user_id = ? AND d.date = ?
+            """,
+            (user_id, day)
+        ).fetchall()
+
+    statuses = dict(rows)
+    if WRITE_BEHIND:
+        for (sub_id, log_day), (_, _, completed) in writer.pending("log", user_id).items():
+            if log_day == day:
+                statuses[sub_id] = completed
+    return statuses
+
+
+
+Milestones = namedtuple("Milestones", "first last total")
+NO_MILESTONES = Milestones(None, None, 0)
+
+
+def get_milestones(user_id):
+    """
+    Milestones(first, last, total): the first and last completed days
+    (ISO) and the number of completed check-ins, from the trigger-kept
+    user_milestones row. NO_MILESTONES before the first completion.
+    """
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT first_date, last_date, total FROM user_milestones WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+    milestones = Milestones(*row) if row else NO_MILESTONES
+
+    if WRITE_BEHIND:
+        # Queued completions can only move the range; total stays committed.
+        queued = [
+            day for (_, day), (_, _, completed) in writer.pending("log", user_id).items()
+            if completed
+        ]
+        if queued:
+            days = queued + [d for d in milestones[:2] if d]
+            milestones = milestones._replace(first=min(days), last=max(days))
+    return milestones
@@ -1,9 +1,8 @@
 import streamlit as st
 from datetime import date as dt_date
 
-from goals.goals_service import get_goals
-from checkin.checkin_service import set_status, get_status
-from utils.session import require_login
+from checkin.checkin_service import set_statuses
+from utils.session import require_login, user_context
 
 
 def render():
@@ -18,12 +17,17 @@ def render():
     st.subheader(f"📅 Today — {selected_date.strftime('%A, %d %b')}")
     st.caption("You can only update today's progress.")
 
-    goals = get_goals(st.session_state.user_id)
+    ctx = user_context()
+    goals = ctx.goals
 
     if not goals:
         st.info("Add goals first to start tracking your habits.")
         return
 
+    # Today's statuses, from the session context
+    statuses = ctx.statuses
+    changes = {}
+
     # ---------------------------------------------
     # RENDER CHECKBOXES
     # ---------------------------------------------
@@ -35,7 +39,7 @@ def render():
             sub_name = sub[1]
 
             # ✅ ALWAYS use selected_date
-            checked = bool(get_status(sub_id, selected_date))
+            checked = bool(statuses.get(sub_id))
 
             val = st.checkbox(
                 sub_name,
@@ -43,11 +47,14 @@ def render():
                 key=f"check_{sub_id}_{selected_date}"
             )
 
-            # -------------------------------------
-            # WRITE ONLY ON CHANGE
-            # -------------------------------------
             if val != checked:
-                set_status(sub_id, selected_date, int(val))
+                changes[sub_id] = int(val)
+
+    # ---------------------------------------------
+    # WRITE ONLY ON CHANGE (one transaction)
+    # ---------------------------------------------
+    if changes:
+        set_statuses(st.session_state.user_id, selected_date, changes)
 
-                # 🚀 Force immediate refresh
-                st.rerun()
+        # 🚀 Force immediate refresh
+        st.rerun()
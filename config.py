@@ -1 +1,92 @@
-APP_NAME = "Minimal Habit Tracker"
\ No newline at end of file
+APP_NAME = "Minimal Habit Tracker"
+
+# -------------------------------------------------
+# DATABASE
+# -------------------------------------------------
+DB_PATH = "habits.db"
+
+# Idle connections kept open for reuse; extra ones are closed on return.
+DB_POOL_SIZE = 8
+
+# Applied once when a connection is opened.
+DB_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -8000,        # KiB (negative) -> ~8 MB page cache
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
+
+# Check-in and to-do toggles are queued and committed in batches by a
+# background thread instead of on the page's own thread (database/writer.py).
+# A failed batch is retried with the wait doubling up to
+# WRITE_BEHIND_MAX_BACKOFF_MS.
+WRITE_BEHIND = False
+WRITE_BEHIND_INTERVAL_MS = 200
+WRITE_BEHIND_MAX_BACKOFF_MS = 30_000
+
+# Defaults for python -m database.compaction. COMPACTION_ARCHIVE_DB names
+# a separate SQLite file for archived logs (None: a table in DB_PATH);
+# COMPACTION_ROLLUP_DAYS folds daily logs older than that many days into
+# monthly totals (None: keep every day).
+COMPACTION_ARCHIVE_DB = None
+COMPACTION_ROLLUP_DAYS = None
+
+# Rows per import transaction and per export checkpoint
+# (python -m database.transfer).
+TRANSFER_CHUNK_ROWS = 5000
+
+# -------------------------------------------------
+# AUTH (auth/credentials.py)
+# -------------------------------------------------
+# New hashes use PASSWORD_SCHEME ("scrypt" or "pbkdf2_sha256"); rows
+# hashed with other parameters are rehashed on the next login.
+PASSWORD_SCHEME = "scrypt"
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+
+# Failed logins allowed per username within the lockout window.
+LOGIN_MAX_FAILURES = 5
+LOGIN_LOCKOUT_SECONDS = 300
+# Usernames with failures tracked at once; the longest-idle are dropped.
+LOGIN_TRACKED_USERNAMES = 10_000
+
+# Idle lifetime of in-memory session tokens. App sessions rotate theirs
+# on every rerun; API bearer tokens expire this long after POST /session.
+SESSION_TOKEN_TTL = 30 * 60
+
+# -------------------------------------------------
+# ANALYTICS CACHE
+# -------------------------------------------------
+# Progress-page snapshots kept in memory (LRU), bounded by both count
+# and the approximate size of the cached DataFrames.
+SNAPSHOT_CACHE_ENTRIES = 32
+SNAPSHOT_CACHE_MB = 256
+
+# Users whose Consistency Map month tiles are kept (progress/tiles.py).
+TILE_CACHE_USERS = 256
+
+# Users whose Progress History (and its month-start copy) is kept
+# (progress/history.py).
+HISTORY_CACHE_USERS = 256
+
+# Where Progress-page metrics are computed: "pandas" loads the user's full
+# history into a DataFrame; "sql" runs each metric as a GROUP BY in SQLite.
+ANALYTICS_BACKEND = "pandas"
+
+# -------------------------------------------------
+# INSTRUMENTATION
+# -------------------------------------------------
+# Per-rerun query/render timings (utils/instrument.py); also enabled by
+# HABITS_INSTRUMENT=1. INSTRUMENT_LOG (or HABITS_INSTRUMENT_LOG) names a
+# JSON-lines file that receives one record per rerun.
+INSTRUMENT = False
+INSTRUMENT_LOG = None
+
+# -------------------------------------------------
+# HTTP API (python -m api.server)
+# -------------------------------------------------
+API_HOST = "127.0.0.1"
+API_PORT = 8765
@@ -0,0 +1,243 @@
+"""
+Compaction: keep daily_logs sized to the habits users still track.
+
+delete_sub_goal() only deactivates a sub-goal and delete_goal() leaves
+the deleted sub-goals' logs behind, so daily_logs keeps rows no page
+reads. compact() copies them into log_archive (in the main database or
+an attached archive file) and commits, then, in a second transaction on
+the main database only, deletes the rows the archive now holds and
+optionally folds live logs older than N days into monthly_logs totals.
+It then runs VACUUM and ANALYZE. SQLite only commits a transaction
+atomically across attached files outside WAL mode, so the copy is
+committed on its own: an interrupted run leaves rows in both places,
+and the next run's upsert and delete finish the job.
+
+    python -m database.compaction [--archive-db archive.db] [--rollup-days 730]
+
+Rolled-up days leave the Progress history, streaks and Consistency Map,
+which only read daily logs. Completions among the removed rows are
+folded into archived_milestones first, so user_milestones (first and
+last completed day, total) does not change. Every user's
+goals and check-ins versions are bumped, so running app and API
+processes rebuild their caches on their next read.
+"""
+import argparse
+from collections import namedtuple
+from datetime import date, timedelta
+
+from config import COMPACTION_ARCHIVE_DB, COMPACTION_ROLLUP_DAYS
+from database.db import get_connection
+from database.schema import ensure_schema
+from database.summary import MILESTONE_REBUILD_STATEMENTS, REBUILD_STATEMENTS
+
+CompactionReport = namedtuple(
+    "CompactionReport", "inactive orphaned rolled_up months bytes_before bytes_after"
+)
+
+# Sub-goals whose logs the app still reads.
+LIVE_SUB_GOALS = """
+    SELECT s.id FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+    WHERE s.active = 1
+"""
+
+ARCHIVE_TABLE = """
+    CREATE TABLE IF NOT EXISTS {schema}.log_archive (
+        sub_goal_id INTEGER,
+        date TEXT,
+        completed INTEGER,
+        user_id INTEGER,
+        reason TEXT,
+        archived_on TEXT,
+        PRIMARY KEY (sub_goal_id, date)
+    ) WITHOUT ROWID
+"""
+
+MONTHLY_TABLE = """
+    CREATE TABLE IF NOT EXISTS monthly_logs (
+        sub_goal_id INTEGER,
+        month TEXT,
+        done INTEGER,
+        days INTEGER,
+        PRIMARY KEY (sub_goal_id, month)
+    ) WITHOUT ROWID
+"""
+
+# Per-row rollup and version triggers on daily_logs deletes; bulk
+# deletes rebuild the rollups and bump every user's versions once instead.
+SUSPENDED_TRIGGERS = [
+    "trg_daily_logs_delete", "trg_milestones_delete", "trg_versions_daily_logs_delete",
+]
+
+BUMP_ALL_USERS = """
+    INSERT INTO user_versions (user_id, goals, checkins)
+    SELECT id, 1, 1 FROM users WHERE true
+    ON CONFLICT (user_id) DO UPDATE SET goals = goals + 1, checkins = checkins + 1
+"""
+
+
+def _size(conn):
+    pages, page_size = (
+        conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("page_count", "page_size")
+    )
+    return pages * page_size
+
+
+# Logs of dead sub-goals whose archived copy is current.
+ARCHIVED = """
+    sub_goal_id NOT IN ({live})
+    AND EXISTS (
+        SELECT 1 FROM {schema}.log_archive a
+        WHERE a.sub_goal_id = daily_logs.sub_goal_id AND a.date = daily_logs.date
+          AND a.completed IS daily_logs.completed
+    )
+"""
+
+# Completions about to leave daily_logs, kept per sub-goal for milestones.
+FOLD_MILESTONES = """
+    INSERT INTO archived_milestones (sub_goal_id, first_date, last_date, total)
+    SELECT sub_goal_id, MIN(date), MAX(date), COUNT(*)
+    FROM daily_logs
+    WHERE completed = 1 AND {where}
+    GROUP BY sub_goal_id
+    ON CONFLICT (sub_goal_id) DO UPDATE
+    SET first_date = MIN(first_date, excluded.first_date),
+        last_date = MAX(last_date, excluded.last_date),
+        total = total + excluded.total
+"""
+
+
+def _copy(conn, schema, today):
+    """Copy logs of inactive and orphaned sub-goals to the archive -> {reason: rows}."""
+    moved = dict(conn.execute(
+        f"""
+        SELECT CASE WHEN s.active = 0 AND g.id IS NOT NULL
+                    THEN 'inactive' ELSE 'orphaned' END AS reason,
+               COUNT(*)
+        FROM daily_logs d
+        LEFT JOIN sub_goals s ON d.sub_goal_id = s.id
+        LEFT JOIN goals g ON s.goal_id = g.id
+        WHERE d.sub_goal_id NOT IN ({LIVE_SUB_GOALS})
+        GROUP BY reason
+        """
+    ).fetchall())
+
+    conn.execute(
+        f"""
+        INSERT INTO {schema}.log_archive
+            (sub_goal_id, date, completed, user_id, reason, archived_on)
+        SELECT d.sub_goal_id, d.date, d.completed, g.user_id,
+               CASE WHEN s.active = 0 AND g.id IS NOT NULL
+                    THEN 'inactive' ELSE 'orphaned' END,
+               ?
+        FROM daily_logs d
+        LEFT JOIN sub_goals s ON d.sub_goal_id = s.id
+        LEFT JOIN goals g ON s.goal_id = g.id
+        WHERE d.sub_goal_id NOT IN ({LIVE_SUB_GOALS})
+        ON CONFLICT (sub_goal_id, date) DO UPDATE
+        SET completed = excluded.completed, user_id = excluded.user_id,
+            reason = excluded.reason, archived_on = excluded.archived_on
+        """,
+        (today,)
+    )
+    return moved
+
+
+def _delete_archived(conn, schema):
+    """Delete the logs _copy() archived, keeping their completions for milestones."""
+    where = ARCHIVED.format(live=LIVE_SUB_GOALS, schema=schema)
+    conn.execute(FOLD_MILESTONES.format(where=where))
+    conn.execute(f"DELETE FROM daily_logs WHERE {where}")
+
+
+def _roll_up(conn, cutoff):
+    """Fold logs dated before cutoff into monthly_logs -> (rows, months)."""
+    conn.execute(MONTHLY_TABLE)
+    months = conn.execute(
+        """
+        INSERT INTO monthly_logs (sub_goal_id, month, done, days)
+        SELECT sub_goal_id, substr(date, 1, 7), SUM(completed), COUNT(*)
+        FROM daily_logs
+        WHERE date < ?
+        GROUP BY sub_goal_id, substr(date, 1, 7)
+        ON CONFLICT (sub_goal_id, month) DO UPDATE
+        SET done = done + excluded.done, days = days + excluded.days
+        """,
+        (cutoff,)
+    ).rowcount
+    conn.execute(FOLD_MILESTONES.format(where="date < ?"), (cutoff,))
+    rows = conn.execute("DELETE FROM daily_logs WHERE date < ?", (cutoff,)).rowcount
+    return rows, months
+
+
+def compact(archive_db=COMPACTION_ARCHIVE_DB, rollup_days=COMPACTION_ROLLUP_DAYS):
+    ensure_schema()
+    today = date.today()
+    schema = "archive" if archive_db else "main"
+
+    with get_connection() as conn:
+        bytes_before = _size(conn)
+        if archive_db:
+            conn.execute("ATTACH DATABASE ? AS archive", (archive_db,))
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(ARCHIVE_TABLE.format(schema=schema))
+            moved = _copy(conn, schema, today.isoformat())
+            conn.commit()
+
+            # Writes only the main database, so it commits atomically.
+            conn.execute("BEGIN IMMEDIATE")
+            triggers = conn.execute(
+                f"""
+                SELECT sql FROM sqlite_master
+                WHERE type = 'trigger'
+                  AND name IN ({", ".join("?" * len(SUSPENDED_TRIGGERS))})
+                """,
+                SUSPENDED_TRIGGERS
+            ).fetchall()
+            for name in SUSPENDED_TRIGGERS:
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+            _delete_archived(conn, schema)
+            rolled_up = months = 0
+            if rollup_days is not None:
+                cutoff = (today - timedelta(days=rollup_days)).isoformat()
+                rolled_up, months = _roll_up(conn, cutoff)
+
+            for statement in REBUILD_STATEMENTS + MILESTONE_REBUILD_STATEMENTS:
+                conn.execute(statement)
+            conn.execute(BUMP_ALL_USERS)
+            for (sql,) in triggers:
+                conn.execute(sql)
+            conn.commit()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if archive_db:
+                conn.execute("DETACH DATABASE archive")
+
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+        bytes_after = _size(conn)
+
+    return CompactionReport(
+        moved.get("inactive", 0), moved.get("orphaned", 0), rolled_up, months,
+        bytes_before, bytes_after
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--archive-db", default=COMPACTION_ARCHIVE_DB,
+                        help="archive into this SQLite file instead of log_archive in the main database")
+    parser.add_argument("--rollup-days", type=int, default=COMPACTION_ROLLUP_DAYS,
+                        help="fold live logs older than this many days into monthly_logs")
+    args = parser.parse_args()
+
+    report = compact(args.archive_db, args.rollup_days)
+    print(f"Archived {report.inactive} logs of inactive and {report.orphaned} of orphaned sub-goals")
+    if args.rollup_days is not None:
+        print(f"Rolled up {report.rolled_up} logs into {report.months} monthly rows")
+    print(
+        f"Database {report.bytes_before / 1024:,.0f} KiB -> {report.bytes_after / 1024:,.0f} KiB "
+        f"({(report.bytes_before - report.bytes_after) / 1024:,.0f} KiB reclaimed)"
+    )
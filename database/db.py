@@ -1,4 +1,107 @@
+import atexit
 import sqlite3
+import threading
+from contextlib import contextmanager
 
+from config import DB_PATH, DB_POOL_SIZE, DB_PRAGMAS
+from utils.instrument import connection_factory
+
+
+# =====================================================
+# CONNECTION POOL
+# =====================================================
+class ConnectionPool:
+    """
+    Bounded LIFO pool of SQLite connections.
+
+    Streamlit runs each rerun on its own script thread, so connections
+    are shared across threads (check_same_thread=False) but only ever
+    checked out by one caller at a time.
+    """
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.closed = 0
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, factory=connection_factory()
+        )
+        for name, value in DB_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            self.misses += 1
+        return self._open()
+
+    def release(self, conn):
+        # Never hand out a connection with a half-finished transaction.
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+            self.closed += 1
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.closed += len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "closed": self.closed,
+                "idle": len(self._idle),
+            }
+
+
+_pool = ConnectionPool(DB_PATH, DB_POOL_SIZE)
+atexit.register(lambda: _pool.close_all())
+
+
+@contextmanager
 def get_connection():
-    return sqlite3.connect("habits.db", check_same_thread=False)
\ No newline at end of file
+    """
+    Check out a pooled connection for the duration of a `with` block.
+
+    Writes still need an explicit conn.commit(); anything left
+    uncommitted is rolled back when the connection is returned.
+    """
+    conn = _pool.acquire()
+    try:
+        yield conn
+    finally:
+        _pool.release(conn)
+
+
+def pool_stats():
+    return _pool.stats()
+
+
+def database_path():
+    return _pool.path
+
+
+def use_database(path):
+    """Point the pool at another database file (benchmarks, tools)."""
+    global _pool
+    _pool.close_all()
+    _pool = ConnectionPool(path, DB_POOL_SIZE)
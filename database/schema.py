@@ -1,42 +1,745 @@
-from database.db import get_connection
+import os
+import sys
+import tempfile
+from datetime import date
 
-def create_tables():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE,
-        password TEXT
-    )
-    """)
+from auth.credentials import hash_password, is_hashed
+from database.db import database_path, get_connection, use_database
 
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS goals (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        name TEXT
-    )
-    """)
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS sub_goals (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        goal_id INTEGER,
-        name TEXT,
-        active INTEGER DEFAULT 1
-    )
-    """)
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS daily_logs (
-        sub_goal_id INTEGER,
-        date TEXT,
-        completed INTEGER,
-        PRIMARY KEY (sub_goal_id, date)
+# =====================================================
+# VERSION TRIGGERS
+# =====================================================
+# Owner lookups per table, as an INSERT ... SELECT of (user_id, 1).
+_OWNERS = {
+    "goals": "SELECT {row}.user_id, 1 WHERE {row}.user_id IS NOT NULL",
+    "sub_goals": "SELECT user_id, 1 FROM goals WHERE id = {row}.goal_id",
+    "daily_logs": """SELECT g.user_id, 1
+        FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+        WHERE s.id = {row}.sub_goal_id""",
+    "todos": "SELECT {row}.user_id, 1 WHERE {row}.user_id IS NOT NULL",
+}
+_DOMAINS = {"goals": "goals", "sub_goals": "goals", "daily_logs": "checkins", "todos": "todos"}
+
+# Check-ins before today also move their month (History, calendar tiles).
+_TOUCH_MONTH = """
+        INSERT INTO checkin_months (user_id, month, version)
+        SELECT g.user_id, substr({row}.date, 1, 7), 1
+        FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+        WHERE s.id = {row}.sub_goal_id AND {row}.date < date('now', 'localtime')
+        ON CONFLICT (user_id, month) DO UPDATE SET version = version + 1;
+"""
+
+
+def _version_triggers():
+    """One AFTER INSERT/UPDATE/DELETE trigger per table bumping user_versions."""
+    triggers = []
+    for table, owner in _OWNERS.items():
+        domain = _DOMAINS[table]
+        for event, row in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+            touch = _TOUCH_MONTH.format(row=row) if table == "daily_logs" else ""
+            triggers.append(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_versions_{table}_{event}
+        AFTER {event.upper()} ON {table}
+        BEGIN
+            INSERT INTO user_versions (user_id, {domain})
+            {owner.format(row=row)}
+            ON CONFLICT (user_id) DO UPDATE SET {domain} = {domain} + 1;
+            {touch.strip()}
+        END
+        """)
+    return triggers
+
+
+# =====================================================
+# PYTHON STEPS
+# =====================================================
+def _hash_plaintext_passwords(conn):
+    """Hash legacy plaintext passwords now instead of at each user's next login."""
+    rows = conn.execute("SELECT id, password FROM users WHERE password IS NOT NULL").fetchall()
+    conn.executemany(
+        "UPDATE users SET password = ? WHERE id = ?",
+        [(hash_password(password), user_id) for user_id, password in rows if not is_hashed(password)]
     )
-    """)
 
-    conn.commit()
-    conn.close()
+
+# =====================================================
+# MIGRATIONS
+# =====================================================
+# Entries are SQL statements, or functions taking the connection for
+# steps SQL cannot do.
+# Each entry upgrades the schema by one version. PRAGMA user_version
+# records how many have been applied, so a current database costs a
+# single integer read at startup. Only ever append to this list.
+MIGRATIONS = [
+    # 1 — base tables
+    [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sub_goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_id INTEGER,
+            name TEXT,
+            active INTEGER DEFAULT 1
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS daily_logs (
+            sub_goal_id INTEGER,
+            date TEXT,
+            completed INTEGER,
+            PRIMARY KEY (sub_goal_id, date)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            task TEXT,
+            due_date TEXT,
+            completed INTEGER DEFAULT 0
+        )
+        """,
+    ],
+    # 2 — indexes matching the service access paths
+    [
+        "CREATE INDEX IF NOT EXISTS idx_goals_user ON goals (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sub_goals_goal ON sub_goals (goal_id, active)",
+        "CREATE INDEX IF NOT EXISTS idx_todos_user_due ON todos (user_id, due_date, completed)",
+        "CREATE INDEX IF NOT EXISTS idx_daily_logs_date ON daily_logs (date, sub_goal_id)",
+    ],
+    # 3 — daily rollups kept current by triggers (see database/summary.py)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS daily_summary (
+            user_id INTEGER,
+            date TEXT,
+            done INTEGER,
+            total INTEGER,
+            PRIMARY KEY (user_id, date)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS goal_daily_summary (
+            user_id INTEGER,
+            goal_id INTEGER,
+            date TEXT,
+            done INTEGER,
+            total INTEGER,
+            PRIMARY KEY (user_id, goal_id, date)
+        ) WITHOUT ROWID
+        """,
+        # A log row counts towards the rollups while its sub-goal is active.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_daily_logs_insert
+        AFTER INSERT ON daily_logs
+        BEGIN
+            INSERT INTO daily_summary (user_id, date, done, total)
+            SELECT g.user_id, NEW.date, NEW.completed, 1
+            FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+            WHERE s.id = NEW.sub_goal_id AND s.active = 1
+            ON CONFLICT (user_id, date) DO UPDATE
+            SET done = done + excluded.done, total = total + excluded.total;
+
+            INSERT INTO goal_daily_summary (user_id, goal_id, date, done, total)
+            SELECT g.user_id, g.id, NEW.date, NEW.completed, 1
+            FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+            WHERE s.id = NEW.sub_goal_id AND s.active = 1
+            ON CONFLICT (user_id, goal_id, date) DO UPDATE
+            SET done = done + excluded.done, total = total + excluded.total;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_daily_logs_update
+        AFTER UPDATE OF completed ON daily_logs
+        WHEN NEW.completed IS NOT OLD.completed
+        BEGIN
+            UPDATE daily_summary
+            SET done = done + NEW.completed - OLD.completed
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = NEW.sub_goal_id AND s.active = 1
+            ) AND date = NEW.date;
+
+            UPDATE goal_daily_summary
+            SET done = done + NEW.completed - OLD.completed
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = NEW.sub_goal_id AND s.active = 1
+            ) AND goal_id = (
+                SELECT goal_id FROM sub_goals WHERE id = NEW.sub_goal_id
+            ) AND date = NEW.date;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_daily_logs_delete
+        AFTER DELETE ON daily_logs
+        BEGIN
+            UPDATE daily_summary
+            SET done = done - OLD.completed, total = total - 1
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id AND s.active = 1
+            ) AND date = OLD.date;
+
+            UPDATE goal_daily_summary
+            SET done = done - OLD.completed, total = total - 1
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id AND s.active = 1
+            ) AND goal_id = (
+                SELECT goal_id FROM sub_goals WHERE id = OLD.sub_goal_id
+            ) AND date = OLD.date;
+
+            DELETE FROM daily_summary
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            ) AND date = OLD.date AND total <= 0;
+
+            DELETE FROM goal_daily_summary
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            ) AND goal_id = (
+                SELECT goal_id FROM sub_goals WHERE id = OLD.sub_goal_id
+            ) AND date = OLD.date AND total <= 0;
+        END
+        """,
+        # Activating/deactivating a sub-goal adds/removes all of its history.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sub_goals_active
+        AFTER UPDATE OF active ON sub_goals
+        WHEN (NEW.active = 1) IS NOT (OLD.active = 1)
+        BEGIN
+            INSERT INTO daily_summary (user_id, date, done, total)
+            SELECT g.user_id, d.date,
+                   CASE WHEN NEW.active = 1 THEN d.completed ELSE -d.completed END,
+                   CASE WHEN NEW.active = 1 THEN 1 ELSE -1 END
+            FROM daily_logs d JOIN goals g ON g.id = NEW.goal_id
+            WHERE d.sub_goal_id = NEW.id
+            ON CONFLICT (user_id, date) DO UPDATE
+            SET done = done + excluded.done, total = total + excluded.total;
+            DELETE FROM daily_summary WHERE total <= 0 AND user_id = (
+                SELECT user_id FROM goals WHERE id = NEW.goal_id
+            );
+
+            INSERT INTO goal_daily_summary (user_id, goal_id, date, done, total)
+            SELECT g.user_id, g.id, d.date,
+                   CASE WHEN NEW.active = 1 THEN d.completed ELSE -d.completed END,
+                   CASE WHEN NEW.active = 1 THEN 1 ELSE -1 END
+            FROM daily_logs d JOIN goals g ON g.id = NEW.goal_id
+            WHERE d.sub_goal_id = NEW.id
+            ON CONFLICT (user_id, goal_id, date) DO UPDATE
+            SET done = done + excluded.done, total = total + excluded.total;
+            DELETE FROM goal_daily_summary WHERE total <= 0 AND goal_id = NEW.goal_id
+              AND user_id = (SELECT user_id FROM goals WHERE id = NEW.goal_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sub_goals_delete
+        AFTER DELETE ON sub_goals
+        WHEN OLD.active = 1
+        BEGIN
+            UPDATE daily_summary
+            SET done = done - (
+                    SELECT d.completed FROM daily_logs d
+                    WHERE d.sub_goal_id = OLD.id AND d.date = daily_summary.date
+                ),
+                total = total - 1
+            WHERE user_id = (SELECT user_id FROM goals WHERE id = OLD.goal_id)
+              AND date IN (SELECT date FROM daily_logs WHERE sub_goal_id = OLD.id);
+            DELETE FROM daily_summary WHERE total <= 0 AND user_id = (
+                SELECT user_id FROM goals WHERE id = OLD.goal_id
+            );
+
+            UPDATE goal_daily_summary
+            SET done = done - (
+                    SELECT d.completed FROM daily_logs d
+                    WHERE d.sub_goal_id = OLD.id AND d.date = goal_daily_summary.date
+                ),
+                total = total - 1
+            WHERE user_id = (SELECT user_id FROM goals WHERE id = OLD.goal_id)
+              AND goal_id = OLD.goal_id
+              AND date IN (SELECT date FROM daily_logs WHERE sub_goal_id = OLD.id);
+            DELETE FROM goal_daily_summary WHERE total <= 0 AND goal_id = OLD.goal_id
+              AND user_id = (SELECT user_id FROM goals WHERE id = OLD.goal_id);
+        END
+        """,
+        # Frozen copy of summary.REBUILD_STATEMENTS as of this migration.
+        "DELETE FROM daily_summary",
+        """
+        INSERT INTO daily_summary (user_id, date, done, total)
+        SELECT g.user_id, d.date, SUM(d.completed), COUNT(*)
+        FROM daily_logs d
+        JOIN sub_goals s ON d.sub_goal_id = s.id
+        JOIN goals g ON s.goal_id = g.id
+        WHERE s.active = 1
+        GROUP BY g.user_id, d.date
+        """,
+        "DELETE FROM goal_daily_summary",
+        """
+        INSERT INTO goal_daily_summary (user_id, goal_id, date, done, total)
+        SELECT g.user_id, g.id, d.date, SUM(d.completed), COUNT(*)
+        FROM daily_logs d
+        JOIN sub_goals s ON d.sub_goal_id = s.id
+        JOIN goals g ON s.goal_id = g.id
+        WHERE s.active = 1
+        GROUP BY g.user_id, g.id, d.date
+        """,
+    ],
+    # 4 — last day each user's unfinished to-dos were rolled over
+    [
+        """
+        CREATE TABLE IF NOT EXISTS todo_rollovers (
+            user_id INTEGER PRIMARY KEY,
+            rolled_on TEXT
+        )
+        """,
+    ],
+    # 5 — per-user completion milestones kept current by triggers
+    [
+        """
+        CREATE TABLE IF NOT EXISTS user_milestones (
+            user_id INTEGER PRIMARY KEY,
+            first_date TEXT,
+            last_date TEXT,
+            total INTEGER
+        )
+        """,
+        # A new completion can only widen the range and add one.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_insert
+        AFTER INSERT ON daily_logs
+        WHEN NEW.completed = 1
+        BEGIN
+            INSERT INTO user_milestones (user_id, first_date, last_date, total)
+            SELECT g.user_id, NEW.date, NEW.date, 1
+            FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+            WHERE s.id = NEW.sub_goal_id
+            ON CONFLICT (user_id) DO UPDATE
+            SET first_date = MIN(first_date, excluded.first_date),
+                last_date = MAX(last_date, excluded.last_date),
+                total = total + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_complete
+        AFTER UPDATE OF completed ON daily_logs
+        WHEN NEW.completed = 1 AND OLD.completed IS NOT 1
+        BEGIN
+            INSERT INTO user_milestones (user_id, first_date, last_date, total)
+            SELECT g.user_id, NEW.date, NEW.date, 1
+            FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+            WHERE s.id = NEW.sub_goal_id
+            ON CONFLICT (user_id) DO UPDATE
+            SET first_date = MIN(first_date, excluded.first_date),
+                last_date = MAX(last_date, excluded.last_date),
+                total = total + 1;
+        END
+        """,
+        # Losing a completion subtracts one; the range is only rescanned
+        # when the lost day was its first or last day.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_uncomplete
+        AFTER UPDATE OF completed ON daily_logs
+        WHEN OLD.completed = 1 AND NEW.completed IS NOT 1
+        BEGIN
+            UPDATE user_milestones
+            SET total = total - 1,
+                first_date = CASE WHEN first_date = OLD.date THEN (
+                    SELECT MIN(d.date)
+                    FROM daily_logs d
+                    JOIN sub_goals s ON d.sub_goal_id = s.id
+                    JOIN goals g ON s.goal_id = g.id
+                    WHERE g.user_id = user_milestones.user_id AND d.completed = 1
+                ) ELSE first_date END,
+                last_date = CASE WHEN last_date = OLD.date THEN (
+                    SELECT MAX(d.date)
+                    FROM daily_logs d
+                    JOIN sub_goals s ON d.sub_goal_id = s.id
+                    JOIN goals g ON s.goal_id = g.id
+                    WHERE g.user_id = user_milestones.user_id AND d.completed = 1
+                ) ELSE last_date END
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            );
+            DELETE FROM user_milestones WHERE total <= 0 AND user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_delete
+        AFTER DELETE ON daily_logs
+        WHEN OLD.completed = 1
+        BEGIN
+            UPDATE user_milestones
+            SET total = total - 1,
+                first_date = CASE WHEN first_date = OLD.date THEN (
+                    SELECT MIN(d.date)
+                    FROM daily_logs d
+                    JOIN sub_goals s ON d.sub_goal_id = s.id
+                    JOIN goals g ON s.goal_id = g.id
+                    WHERE g.user_id = user_milestones.user_id AND d.completed = 1
+                ) ELSE first_date END,
+                last_date = CASE WHEN last_date = OLD.date THEN (
+                    SELECT MAX(d.date)
+                    FROM daily_logs d
+                    JOIN sub_goals s ON d.sub_goal_id = s.id
+                    JOIN goals g ON s.goal_id = g.id
+                    WHERE g.user_id = user_milestones.user_id AND d.completed = 1
+                ) ELSE last_date END
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            );
+            DELETE FROM user_milestones WHERE total <= 0 AND user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            );
+        END
+        """,
+        # A deleted sub-goal takes all of its completions with it.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_sub_goal_delete
+        AFTER DELETE ON sub_goals
+        BEGIN
+            DELETE FROM user_milestones
+            WHERE user_id = (SELECT user_id FROM goals WHERE id = OLD.goal_id);
+
+            INSERT INTO user_milestones (user_id, first_date, last_date, total)
+            SELECT g.user_id, MIN(d.date), MAX(d.date), COUNT(*)
+            FROM daily_logs d
+            JOIN sub_goals s ON d.sub_goal_id = s.id
+            JOIN goals g ON s.goal_id = g.id
+            WHERE g.user_id = (SELECT user_id FROM goals WHERE id = OLD.goal_id)
+              AND d.completed = 1
+            GROUP BY g.user_id;
+        END
+        """,
+        # Frozen copy of the milestone rebuild as of this migration.
+        "DELETE FROM user_milestones",
+        """
+        INSERT INTO user_milestones (user_id, first_date, last_date, total)
+        SELECT g.user_id, MIN(d.date), MAX(d.date), COUNT(*)
+        FROM daily_logs d
+        JOIN sub_goals s ON d.sub_goal_id = s.id
+        JOIN goals g ON s.goal_id = g.id
+        WHERE d.completed = 1
+        GROUP BY g.user_id
+        """,
+    ],
+    # 6 — unfinished to-dos by due date (nightly roll_over_all_users)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_todos_open_due ON todos (due_date) WHERE completed = 0",
+    ],
+    # 7 — per-user data versions kept current by triggers (utils/versions.py)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS user_versions (
+            user_id INTEGER PRIMARY KEY,
+            goals INTEGER NOT NULL DEFAULT 0,
+            checkins INTEGER NOT NULL DEFAULT 0,
+            todos INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS checkin_months (
+            user_id INTEGER,
+            month TEXT,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (user_id, month)
+        ) WITHOUT ROWID
+        """,
+        *_version_triggers(),
+    ],
+    # 8 — completions compaction moved out of daily_logs still count as
+    #     milestones: archived per-sub-goal spans, and the rescans read both
+    [
+        """
+        CREATE TABLE IF NOT EXISTS archived_milestones (
+            sub_goal_id INTEGER PRIMARY KEY,
+            first_date TEXT,
+            last_date TEXT,
+            total INTEGER
+        )
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS milestone_spans (user_id, first_date, last_date, total) AS
+        SELECT g.user_id, d.date, d.date, 1
+        FROM daily_logs d
+        JOIN sub_goals s ON d.sub_goal_id = s.id
+        JOIN goals g ON s.goal_id = g.id
+        WHERE d.completed = 1
+        UNION ALL
+        SELECT g.user_id, a.first_date, a.last_date, a.total
+        FROM archived_milestones a
+        JOIN sub_goals s ON a.sub_goal_id = s.id
+        JOIN goals g ON s.goal_id = g.id
+        """,
+        "DROP TRIGGER IF EXISTS trg_milestones_uncomplete",
+        "DROP TRIGGER IF EXISTS trg_milestones_delete",
+        "DROP TRIGGER IF EXISTS trg_milestones_sub_goal_delete",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_uncomplete
+        AFTER UPDATE OF completed ON daily_logs
+        WHEN OLD.completed = 1 AND NEW.completed IS NOT 1
+        BEGIN
+            UPDATE user_milestones
+            SET total = total - 1,
+                first_date = CASE WHEN first_date = OLD.date THEN (
+                    SELECT MIN(m.first_date) FROM milestone_spans m
+                    WHERE m.user_id = user_milestones.user_id
+                ) ELSE first_date END,
+                last_date = CASE WHEN last_date = OLD.date THEN (
+                    SELECT MAX(m.last_date) FROM milestone_spans m
+                    WHERE m.user_id = user_milestones.user_id
+                ) ELSE last_date END
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            );
+            DELETE FROM user_milestones WHERE total <= 0 AND user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_delete
+        AFTER DELETE ON daily_logs
+        WHEN OLD.completed = 1
+        BEGIN
+            UPDATE user_milestones
+            SET total = total - 1,
+                first_date = CASE WHEN first_date = OLD.date THEN (
+                    SELECT MIN(m.first_date) FROM milestone_spans m
+                    WHERE m.user_id = user_milestones.user_id
+                ) ELSE first_date END,
+                last_date = CASE WHEN last_date = OLD.date THEN (
+                    SELECT MAX(m.last_date) FROM milestone_spans m
+                    WHERE m.user_id = user_milestones.user_id
+                ) ELSE last_date END
+            WHERE user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            );
+            DELETE FROM user_milestones WHERE total <= 0 AND user_id = (
+                SELECT g.user_id
+                FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+                WHERE s.id = OLD.sub_goal_id
+            );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_sub_goal_delete
+        AFTER DELETE ON sub_goals
+        BEGIN
+            DELETE FROM archived_milestones WHERE sub_goal_id = OLD.id;
+            DELETE FROM user_milestones
+            WHERE user_id = (SELECT user_id FROM goals WHERE id = OLD.goal_id);
+
+            INSERT INTO user_milestones (user_id, first_date, last_date, total)
+            SELECT user_id, MIN(first_date), MAX(last_date), SUM(total)
+            FROM milestone_spans
+            WHERE user_id = (SELECT user_id FROM goals WHERE id = OLD.goal_id)
+            GROUP BY user_id;
+        END
+        """,
+    ],
+    # 9 — hash the remaining legacy plaintext passwords
+    [
+        _hash_plaintext_passwords,
+    ],
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def create_tables():
+    with get_connection() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        for number in range(version + 1, SCHEMA_VERSION + 1):
+            conn.execute("BEGIN")
+            for statement in MIGRATIONS[number - 1]:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+
+
+_migrated = set()       # database files already checked by this process
+
+
+def ensure_schema():
+    """create_tables() once per process (and database file)."""
+    path = database_path()
+    if path not in _migrated:
+        create_tables()
+        _migrated.add(path)
+
+
+# =====================================================
+# QUERY PLAN CHECK
+# =====================================================
+# Service statements allowed to scan a whole table, and why.
+SCAN_EXEMPT = {
+    "INSERT INTO todo_rollovers": "nightly batch marks every user as rolled over",
+}
+
+
+def _service_calls():
+    """Run every service read and write once against the current database."""
+    # Imported here: the services import this module's package.
+    from auth.auth_service import authenticate, set_password
+    from checkin import checkin_service
+    from database import writer
+    from goals import goals_service
+    from progress import analytics, history, sql_backend, tiles
+    from todo import todo_service
+
+    today = date.today().isoformat()
+    with get_connection() as conn:
+        user_id = conn.execute(
+            "INSERT INTO users (username, password) VALUES ('plan_check', 'x')"
+        ).lastrowid
+        conn.commit()
+
+    set_password(user_id, "plan-check")
+    authenticate("plan_check", "plan-check")
+
+    goals_service.add_goal(user_id, "Goal")
+    goals_service.add_goal(user_id, "Spare")
+    (goal, subs), (spare, _) = goals_service.get_goals(user_id)
+    goals_service.add_sub_goal(goal.id, "Habit")
+    goals_service.add_sub_goal(goal.id, "Other")
+    goals_service.add_sub_goal(spare.id, "Gone")
+    (goal, subs), (spare, spare_subs) = goals_service.get_goals(user_id)
+
+    checkin_service.set_status(subs[0].id, today, 1)
+    checkin_service.set_statuses(user_id, today, {subs[0].id: 0, subs[1].id: 1})
+    checkin_service.set_status(spare_subs[0].id, today, 1)
+    checkin_service.get_status(subs[0].id, today)
+    checkin_service.get_statuses(user_id, today)
+    checkin_service.get_milestones(user_id)
+
+    todo_service.add_task(user_id, "Task", today)
+    todo_service.add_task(user_id, "Old", "2000-01-01")
+    task_id = todo_service.get_tasks(user_id, today)[0][0]
+    todo_service.get_tasks_range(user_id, today, today)
+    todo_service.set_status(task_id, 1, user_id)
+    todo_service.roll_over_unfinished_tasks(user_id)
+    todo_service.roll_over_all_users()
+    todo_service.delete_task(task_id)
+
+    analytics.load_data(user_id)
+    analytics.load_daily(user_id, last=21)
+    analytics.load_daily(user_id, "Goal")
+    analytics.load_daily(user_id, "Goal", "Habit", since=today)
+    history.get_history(user_id)
+    tiles.heatmap_grid(user_id, (None, None))
+    sql_backend.goal_options(user_id)
+    sql_backend.sub_goal_options(user_id, "Goal")
+    for name in ("active_days", "completion_rate", "daily_completion", "goal_contribution",
+                 "goal_scores", "habit_scores", "habit_streaks", "fragile_habit",
+                 "perfect_days", "consistency_trend", "weekday_pattern"):
+        getattr(sql_backend, name)(user_id, "Goal", None)
+
+    goals_service.delete_sub_goal(subs[1].id)
+    goals_service.delete_goal(spare.id)
+    writer.flush()          # queued toggles under WRITE_BEHIND
+
+
+def _table_scans(conn, statement):
+    """
+    The plan's SCAN steps over tables, under their name or alias
+    (`SCAN d`). Scans of CTEs, views and subqueries, which the plan
+    first declares as MATERIALIZE or CO-ROUTINE steps, are not checked.
+    """
+    plan = [detail for *_, detail in conn.execute("EXPLAIN QUERY PLAN " + statement)]
+    derived = {
+        detail.split()[1] for detail in plan
+        if detail.startswith(("MATERIALIZE ", "CO-ROUTINE "))
+    }
+    return [
+        detail for detail in plan
+        if detail.startswith("SCAN ")
+        and detail.split()[1] not in derived
+        and not detail.startswith(("SCAN (", "SCAN CONSTANT ROW"))
+    ]
+
+
+def check_plans():
+    """
+    Run the services against a scratch database and EXPLAIN QUERY PLAN
+    every statement they executed. Returns [(statement, plan step)] for
+    each full table scan that SCAN_EXEMPT does not allow.
+    """
+    statements = []
+    original = database_path()
+    use_database(os.path.join(tempfile.mkdtemp(prefix="habits-plans-"), "plans.db"))
+    try:
+        create_tables()
+        # Two traced pooled connections cover services that nest get_connection().
+        with get_connection() as first, get_connection() as second:
+            for conn in (first, second):
+                conn.set_trace_callback(statements.append)
+        _service_calls()
+
+        scans = []
+        with get_connection() as conn:
+            conn.set_trace_callback(None)
+            for statement in dict.fromkeys(" ".join(s.split()) for s in statements):
+                if not statement.upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")):
+                    continue
+                if statement.startswith(tuple(SCAN_EXEMPT)):
+                    continue
+                scans += [(statement, detail) for detail in _table_scans(conn, statement)]
+        return scans
+    finally:
+        use_database(original)
+
+
+if __name__ == "__main__":
+    if "--check-plans" in sys.argv:
+        failures = check_plans()
+        for statement, detail in failures:
+            print(f"{detail}:\n    {statement}")
+        print("No full table scans" if not failures else f"{len(failures)} full table scans")
+        sys.exit(1 if failures else 0)
+
+    create_tables()
+    print(f"Schema at version {SCHEMA_VERSION}")
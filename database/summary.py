@@ -0,0 +1,101 @@
+"""
+Pre-aggregated daily completion rollups.
+
+daily_summary holds one row per (user, day) and goal_daily_summary one
+row per (user, goal, day), both counting only active sub-goals, exactly
+like analytics.load_data. Triggers on daily_logs and sub_goals (schema
+migration 3) keep them current on every write.
+
+user_milestones holds one row per user with completions: the first and
+last completed day and the number of completed check-ins, counting every
+sub-goal the user still has (active or not), including completions
+compaction moved out of daily_logs (archived_milestones, one span per
+sub-goal). Its triggers (migrations 5 and 8) apply completions
+incrementally and only recompute a user's row from milestone_spans when
+a boundary day or a whole sub-goal goes away.
+
+rebuild_summaries() regenerates all rollups from scratch and
+verify_summaries() diffs them against the live aggregation.
+
+    python -m database.summary            # rebuild, then verify
+    python -m database.summary --check    # verify only
+"""
+import sys
+
+from database.db import get_connection
+
+LIVE_DAILY = """
+    SELECT g.user_id, d.date, SUM(d.completed), COUNT(*)
+    FROM daily_logs d
+    JOIN sub_goals s ON d.sub_goal_id = s.id
+    JOIN goals g ON s.goal_id = g.id
+    WHERE s.active = 1
+    GROUP BY g.user_id, d.date
+"""
+
+LIVE_GOAL_DAILY = """
+    SELECT g.user_id, g.id, d.date, SUM(d.completed), COUNT(*)
+    FROM daily_logs d
+    JOIN sub_goals s ON d.sub_goal_id = s.id
+    JOIN goals g ON s.goal_id = g.id
+    WHERE s.active = 1
+    GROUP BY g.user_id, g.id, d.date
+"""
+
+# milestone_spans (migration 8): live completions plus archived spans.
+LIVE_MILESTONES = """
+    SELECT user_id, MIN(first_date), MAX(last_date), SUM(total)
+    FROM milestone_spans
+    GROUP BY user_id
+"""
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM daily_summary",
+    "INSERT INTO daily_summary (user_id, date, done, total)" + LIVE_DAILY,
+    "DELETE FROM goal_daily_summary",
+    "INSERT INTO goal_daily_summary (user_id, goal_id, date, done, total)" + LIVE_GOAL_DAILY,
+]
+
+MILESTONE_REBUILD_STATEMENTS = [
+    "DELETE FROM user_milestones",
+    "INSERT INTO user_milestones (user_id, first_date, last_date, total)" + LIVE_MILESTONES,
+]
+
+
+def rebuild_summaries():
+    with get_connection() as conn:
+        conn.execute("BEGIN")
+        for statement in REBUILD_STATEMENTS + MILESTONE_REBUILD_STATEMENTS:
+            conn.execute(statement)
+        conn.commit()
+
+
+def verify_summaries():
+    """
+    Return the number of rollup rows that disagree with daily_logs
+    (missing, extra or different counts). 0 means consistent.
+    """
+    checks = [
+        ("SELECT user_id, date, done, total FROM daily_summary", LIVE_DAILY),
+        ("SELECT user_id, goal_id, date, done, total FROM goal_daily_summary", LIVE_GOAL_DAILY),
+        ("SELECT user_id, first_date, last_date, total FROM user_milestones", LIVE_MILESTONES),
+    ]
+
+    mismatched = 0
+    with get_connection() as conn:
+        for stored, live in checks:
+            for left, right in ((stored, live), (live, stored)):
+                mismatched += conn.execute(
+                    f"SELECT COUNT(*) FROM ({left} EXCEPT {right})"
+                ).fetchone()[0]
+    return mismatched
+
+
+if __name__ == "__main__":
+    if "--check" not in sys.argv:
+        rebuild_summaries()
+        print("Rebuilt daily summaries")
+
+    bad = verify_summaries()
+    print("Summaries match daily_logs" if not bad else f"{bad} summary rows out of sync")
+    sys.exit(1 if bad else 0)
@@ -0,0 +1,429 @@
+"""
+Streaming export and import of one user's data.
+
+    python -m database.transfer export demo demo.ndjson [--checkpoint demo.ckpt]
+    python -m database.transfer import demo demo.csv    [--checkpoint demo.ckpt]
+
+A file is a stream of records: goals, then sub-goals, check-ins and
+to-dos, as newline-delimited JSON or as CSV with the COLUMNS header.
+Goals and sub-goals are referred to by name, so a file can be imported
+into another database or user:
+
+    {"type": "goal", "goal": "Health"}
+    {"type": "sub_goal", "goal": "Health", "sub_goal": "Walk", "active": 1}
+    {"type": "log", "goal": "Health", "sub_goal": "Walk", "date": "2025-01-31", "completed": 1}
+    {"type": "todo", "task": "Call mum", "date": "2025-02-01", "completed": 0, "occurrence": 0}
+
+Export walks keyset-ordered queries and writes as it reads. Import
+applies check-ins and to-dos in TRANSFER_CHUNK_ROWS-row transactions.
+Both use constant memory and, given --checkpoint, save their position
+after each chunk so an interrupted run continues where it stopped.
+
+Import first reads the whole file and, before writing anything, stops
+at the first bad record with its line number: dates must be ISO dates
+(stored as YYYY-MM-DD), flags 0 or 1 and names non-empty.
+
+Import is idempotent. Goals and sub-goals are matched by name and only
+created when missing. Check-ins are upserted with set_status()'s
+statement. A to-do's key is (task, due date, occurrence), where
+occurrence numbers the user's to-dos with the same task and due date in
+id order. So duplicates stay distinct: the n-th matching row gets the
+record's completed flag, and a to-do is inserted when fewer exist.
+"""
+import argparse
+import csv
+import json
+import os
+from datetime import date
+
+from checkin.checkin_service import UPSERT_LOG
+from config import TRANSFER_CHUNK_ROWS
+from database.db import get_connection
+from database.schema import ensure_schema
+from utils.dates import to_key
+
+COLUMNS = ["type", "goal", "sub_goal", "active", "date", "completed", "task", "occurrence"]
+
+# Fields each record type uses; the rest of a record is ignored.
+FIELDS = {
+    "goal": ("goal",),
+    "sub_goal": ("goal", "sub_goal", "active"),
+    "log": ("goal", "sub_goal", "date", "completed"),
+    "todo": ("task", "date", "completed", "occurrence"),
+}
+OPTIONAL = {"active": 1, "occurrence": 0}
+
+
+def _format(path, fmt):
+    return fmt or ("csv" if path.lower().endswith(".csv") else "ndjson")
+
+
+def _user_id(conn, username):
+    row = conn.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()
+    if row is None:
+        raise ValueError(f"unknown user: {username!r}")
+    return row[0]
+
+
+# =====================================================
+# CHECKPOINTS
+# =====================================================
+def _load_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def _save_checkpoint(path, state):
+    if not path:
+        return
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+# =====================================================
+# EXPORT
+# =====================================================
+SECTIONS = ["goal", "sub_goal", "log", "todo"]
+
+
+def export_records(user_id, section="goal", after=None):
+    """
+    Yield (section, key, record) for every row of the user's data, from
+    `section` on and past `after` (the key of the last exported row).
+    """
+    start = SECTIONS.index(section)
+    with get_connection() as conn:
+        if start <= 0:
+            for key, name in conn.execute(
+                "SELECT id, name FROM goals WHERE user_id = ? AND id > ? ORDER BY id",
+                (user_id, after if section == "goal" and after else 0)
+            ):
+                yield "goal", key, {"type": "goal", "goal": name}
+
+        sub_goals = conn.execute(
+            """
+            SELECT s.id, g.name, s.name, s.active
+            FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+            WHERE g.user_id = ?
+            ORDER BY s.id
+            """,
+            (user_id,)
+        ).fetchall()
+
+        if start <= 1:
+            for key, goal, name, active in sub_goals:
+                if section == "sub_goal" and after and key <= after:
+                    continue
+                yield "sub_goal", key, {
+                    "type": "sub_goal", "goal": goal, "sub_goal": name, "active": active,
+                }
+
+        if start <= 2:
+            # One primary-key range scan per sub-goal: no sort, no buffering.
+            resume = tuple(after) if section == "log" and after else (0, "")
+            for sub_id, goal, name, _ in sub_goals:
+                if sub_id < resume[0]:
+                    continue
+                for day, completed in conn.execute(
+                    """
+                    SELECT date, completed FROM daily_logs
+                    WHERE sub_goal_id = ? AND date > ?
+                    ORDER BY date
+                    """,
+                    (sub_id, resume[1] if sub_id == resume[0] else "")
+                ):
+                    yield "log", (sub_id, day), {
+                        "type": "log", "goal": goal, "sub_goal": name,
+                        "date": day, "completed": completed,
+                    }
+
+        for key, task, due, completed, occurrence in conn.execute(
+            """
+            SELECT id, task, due_date, completed, occurrence FROM (
+                SELECT id, task, due_date, completed,
+                       ROW_NUMBER() OVER (PARTITION BY task, due_date ORDER BY id) - 1
+                           AS occurrence
+                FROM todos
+                WHERE user_id = ?
+            )
+            WHERE id > ?
+            ORDER BY id
+            """,
+            (user_id, after if section == "todo" and after else 0)
+        ):
+            yield "todo", key, {
+                "type": "todo", "task": task, "date": due,
+                "completed": completed, "occurrence": occurrence,
+            }
+
+
+def export_user(username, path, fmt=None, checkpoint=None):
+    """Write the user's data to `path`; returns the number of records written."""
+    fmt = _format(path, fmt)
+    with get_connection() as conn:
+        user_id = _user_id(conn, username)
+
+    state = _load_checkpoint(checkpoint)
+    if state:
+        with open(path, "r+b") as f:
+            f.truncate(state["offset"])     # drop anything after the last checkpoint
+        section, after, written = state["section"], state["after"], state["written"]
+    else:
+        section, after, written = "goal", None, 0
+
+    with open(path, "a" if state else "w", encoding="utf-8", newline="") as f:
+        out = csv.writer(f) if fmt == "csv" else None
+        if out and not state:
+            out.writerow(COLUMNS)
+
+        pending = 0
+        for section, key, record in export_records(user_id, section, after):
+            if out:
+                out.writerow([record.get(c) for c in COLUMNS])
+            else:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            written += 1
+            pending += 1
+            if pending == TRANSFER_CHUNK_ROWS:
+                f.flush()
+                _save_checkpoint(checkpoint, {
+                    "section": section, "after": key, "written": written, "offset": f.tell(),
+                })
+                pending = 0
+
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return written
+
+
+# =====================================================
+# IMPORT
+# =====================================================
+def read_records(path, fmt=None, offset=0):
+    """
+    Yield (line, end_offset, record) for the records ending after
+    `offset`: the physical line the record starts on, and where the next
+    record starts. Values are as in the file (CSV: strings, "" -> None).
+    """
+    fmt = _format(path, fmt)
+    with open(path, "rb") as f:
+        lines = (line.decode("utf-8") for line in iter(f.readline, b""))
+        if fmt == "csv":
+            # csv pulls exactly one row's lines at a time, so tell() stays exact.
+            reader = csv.reader(lines)
+            header = next(reader, [])
+            start = reader.line_num + 1
+            for row in reader:
+                if f.tell() > offset:
+                    yield start, f.tell(), {
+                        name: value if value != "" else None
+                        for name, value in zip(header, row)
+                    }
+                start = reader.line_num + 1
+        else:
+            for number, line in enumerate(lines, 1):
+                if line.strip() and f.tell() > offset:
+                    try:
+                        record = json.loads(line)
+                    except ValueError as e:
+                        raise ValueError(f"line {number}: not JSON ({e})") from None
+                    yield number, f.tell(), record
+
+
+def _int(value):
+    """A non-negative int from an int or a CSV digit string, else ValueError."""
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    raise ValueError
+
+
+def clean_record(record):
+    """The record's fields, checked and normalized; ValueError says what is wrong."""
+    if not isinstance(record, dict) or record.get("type") not in FIELDS:
+        kind = record.get("type") if isinstance(record, dict) else record
+        raise ValueError(f"unknown record type: {kind!r}")
+
+    clean = {"type": record["type"]}
+    for name in FIELDS[record["type"]]:
+        value = record.get(name)
+        if value is None and name in OPTIONAL:
+            value = OPTIONAL[name]
+        elif value is None:
+            raise ValueError(f"missing {name!r}")
+        elif name == "date":
+            try:
+                value = to_key(date.fromisoformat(value))
+            except (TypeError, ValueError):
+                raise ValueError(f"date {value!r} is not YYYY-MM-DD") from None
+        elif name in ("active", "completed"):
+            try:
+                value = _int(value)
+                if value > 1:
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f"{name} {value!r} is not 0 or 1") from None
+        elif name == "occurrence":
+            try:
+                value = _int(value)
+            except ValueError:
+                raise ValueError(f"occurrence {value!r} is not a count") from None
+        elif not isinstance(value, str) or not value:
+            raise ValueError(f"{name} {value!r} is not a name")
+        clean[name] = value
+    return clean
+
+
+def check_records(path, fmt=None):
+    """Raise ValueError("line N: ...") for the first bad record in the file."""
+    for line, _, record in read_records(path, fmt):
+        try:
+            clean_record(record)
+        except ValueError as e:
+            raise ValueError(f"line {line}: {e}") from None
+
+
+class _Importer:
+    """Resolves names to ids and buffers check-ins and to-dos per chunk."""
+
+    def __init__(self, conn, user_id):
+        self.conn = conn
+        self.user_id = user_id
+        self.goals = {}
+        self.sub_goals = {}
+        for goal_id, name in conn.execute(
+            "SELECT id, name FROM goals WHERE user_id = ? ORDER BY id DESC", (user_id,)
+        ):
+            self.goals[name] = goal_id
+        # Active sub-goals win over deactivated ones of the same name.
+        for sub_id, goal, name in conn.execute(
+            """
+            SELECT s.id, g.name, s.name
+            FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+            WHERE g.user_id = ?
+            ORDER BY s.active, s.id DESC
+            """,
+            (user_id,)
+        ):
+            self.sub_goals[(goal, name)] = sub_id
+        self.logs = []
+        self.todos = []
+
+    def goal(self, name):
+        if name not in self.goals:
+            self.goals[name] = self.conn.execute(
+                "INSERT INTO goals (user_id, name) VALUES (?, ?)", (self.user_id, name)
+            ).lastrowid
+        return self.goals[name]
+
+    def sub_goal(self, goal, name, active=1):
+        if (goal, name) not in self.sub_goals:
+            self.sub_goals[(goal, name)] = self.conn.execute(
+                "INSERT INTO sub_goals (goal_id, name, active) VALUES (?, ?, ?)",
+                (self.goal(goal), name, active)
+            ).lastrowid
+        return self.sub_goals[(goal, name)]
+
+    def add(self, record):
+        """Take one clean_record()."""
+        kind = record["type"]
+        if kind == "goal":
+            self.goal(record["goal"])
+        elif kind == "sub_goal":
+            self.sub_goal(record["goal"], record["sub_goal"], record["active"])
+        elif kind == "log":
+            self.logs.append((
+                self.sub_goal(record["goal"], record["sub_goal"]),
+                record["date"], record["completed"],
+            ))
+        elif kind == "todo":
+            self.todos.append((
+                record["task"], record["date"], record["completed"], record["occurrence"],
+            ))
+
+    def write(self):
+        """Apply the buffered rows."""
+        self.conn.executemany(UPSERT_LOG, self.logs)
+        # The n-th (task, due date) row in id order is occurrence n.
+        self.conn.executemany(
+            """
+            UPDATE todos SET completed = ?
+            WHERE id = (
+                SELECT id FROM todos
+                WHERE user_id = ? AND due_date = ? AND task = ?
+                ORDER BY id LIMIT 1 OFFSET ?
+            )
+            """,
+            [
+                (completed, self.user_id, due, task, occurrence)
+                for task, due, completed, occurrence in self.todos
+            ]
+        )
+        self.conn.executemany(
+            """
+            INSERT INTO todos (user_id, task, due_date, completed)
+            SELECT ?, ?, ?, ?
+            WHERE (
+                SELECT COUNT(*) FROM todos WHERE user_id = ? AND due_date = ? AND task = ?
+            ) <= ?
+            """,
+            [
+                (self.user_id, task, due, completed, self.user_id, due, task, occurrence)
+                for task, due, completed, occurrence in self.todos
+            ]
+        )
+        self.logs, self.todos = [], []
+
+
+def import_user(username, path, fmt=None, checkpoint=None):
+    """Apply the records in `path` to the user; returns the number of records read."""
+    ensure_schema()
+    check_records(path, fmt)
+    state = _load_checkpoint(checkpoint) or {"offset": 0, "read": 0}
+    read = state["read"]
+
+    with get_connection() as conn:
+        user_id = _user_id(conn, username)
+        importer = _Importer(conn, user_id)
+
+        conn.execute("BEGIN")
+        pending = 0
+        for _, offset, record in read_records(path, fmt, state["offset"]):
+            importer.add(clean_record(record))
+            read += 1
+            pending += 1
+            if pending == TRANSFER_CHUNK_ROWS:
+                importer.write()
+                conn.commit()
+                _save_checkpoint(checkpoint, {"offset": offset, "read": read})
+                conn.execute("BEGIN")
+                pending = 0
+
+        importer.write()
+        conn.commit()
+
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return read
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("username")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"],
+                        help="default: from the file extension (.csv, else ndjson)")
+    parser.add_argument("--checkpoint", help="resume file for interrupted runs")
+    args = parser.parse_args()
+
+    if args.action == "export":
+        count = export_user(args.username, args.path, args.format, args.checkpoint)
+        print(f"Exported {count} records to {args.path}")
+    else:
+        count = import_user(args.username, args.path, args.format, args.checkpoint)
+        print(f"Imported {count} records from {args.path}")
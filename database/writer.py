@@ -0,0 +1,150 @@
+"""
+Optional write-behind queue for check-in and to-do toggles.
+
+With config.WRITE_BEHIND on, the services submit() small writes here
+instead of committing on the Streamlit script thread. Each write has a
+key (e.g. ("log", sub_goal_id, date) or ("task", task_id)), so repeated
+flips of the same row coalesce and only the latest value is written. A
+single daemon thread commits whatever is pending in one transaction
+every WRITE_BEHIND_INTERVAL_MS. A batch that fails is logged and kept,
+and retried with a doubling wait (up to WRITE_BEHIND_MAX_BACKOFF_MS);
+the thread itself never exits, and submit() restarts it if it did.
+
+Until a write is committed the services overlay pending() on their own
+reads, so users see their toggles immediately. submit() bumps this
+process's versions so caches pick up the overlay; the commit moves
+user_versions through the schema triggers, so caches built from
+committed data only in between (Progress snapshots) are refreshed.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from config import WRITE_BEHIND_INTERVAL_MS, WRITE_BEHIND_MAX_BACKOFF_MS
+from database.db import get_connection
+from utils.versions import bump
+
+log = logging.getLogger(__name__)
+
+Write = namedtuple("Write", "sql params user_id domains")
+
+
+class WriteBehind:
+    def __init__(self, interval, max_backoff):
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._pending = {}          # key -> Write, not yet picked up
+        self._flushing = {}         # key -> Write, being committed
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.batches = 0
+        self.writes = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def submit(self, key, sql, params, user_id, *domains):
+        with self._lock:
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = Write(sql, params, user_id, domains)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="write-behind", daemon=True
+                )
+                self._thread.start()
+        bump(user_id, *domains)
+        self._wake.set()
+
+    def pending(self, kind, user_id):
+        """Uncommitted {key[1:]: params} of one kind for one user."""
+        with self._lock:
+            merged = {**self._flushing, **self._pending}
+        return {
+            key[1:]: write.params
+            for key, write in merged.items()
+            if key[0] == kind and write.user_id == user_id
+        }
+
+    def flush(self):
+        """Commit everything pending now, on the calling thread."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._flushing = batch
+            if not batch:
+                return
+
+            statements = {}
+            for write in batch.values():
+                statements.setdefault(write.sql, []).append(write.params)
+
+            try:
+                with get_connection() as conn:
+                    conn.execute("BEGIN")
+                    for sql, rows in statements.items():
+                        conn.executemany(sql, rows)
+                    conn.commit()
+            except Exception:
+                # Keep the batch for the next round unless superseded.
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                    self._flushing = {}
+                raise
+
+            with self._lock:
+                self._flushing = {}
+                self.batches += 1
+                self.writes += len(batch)
+
+    def _run(self):
+        delay = self.interval
+        while True:
+            self._wake.wait()
+            # Let a burst of clicks coalesce into one transaction, or
+            # back off after a failed one.
+            time.sleep(delay)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                with self._lock:
+                    self.failures += 1
+                delay = min(delay * 2, self.max_backoff)
+                log.exception("write-behind flush failed; retrying in %.1fs", delay)
+                self._wake.set()
+            else:
+                delay = self.interval
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending) + len(self._flushing),
+                "batches": self.batches,
+                "writes": self.writes,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+            }
+
+
+_writer = WriteBehind(WRITE_BEHIND_INTERVAL_MS / 1000, WRITE_BEHIND_MAX_BACKOFF_MS / 1000)
+atexit.register(lambda: _writer.flush())
+
+
+def submit(key, sql, params, user_id, *domains):
+    _writer.submit(key, sql, params, user_id, *domains)
+
+
+def pending(kind, user_id):
+    return _writer.pending(kind, user_id)
+
+
+def flush():
+    _writer.flush()
+
+
+def writer_stats():
+    return _writer.stats()
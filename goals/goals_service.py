@@ -1,61 +1,90 @@
+from collections import namedtuple
+
 from database.db import get_connection
 
+Goal = namedtuple("Goal", "id name")
+SubGoal = namedtuple("SubGoal", "id name")
+GoalNode = namedtuple("GoalNode", "goal subs")
+
+
+def sub_goal_owner(conn, sub_goal_id):
+    row = conn.execute(
+        """
+        SELECT g.user_id
+        FROM sub_goals s JOIN goals g ON s.goal_id = g.id
+        WHERE s.id=?
+        """,
+        (sub_goal_id,)
+    ).fetchone()
+    return row[0] if row else None
+
 def add_goal(user_id, name):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO goals (user_id, name) VALUES (?, ?)",
-        (user_id, name)
-    )
-    conn.commit()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO goals (user_id, name) VALUES (?, ?)",
+            (user_id, name)
+        )
+        conn.commit()
 
 def add_sub_goal(goal_id, name):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO sub_goals (goal_id, name) VALUES (?, ?)",
-        (goal_id, name)
-    )
-    conn.commit()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO sub_goals (goal_id, name) VALUES (?, ?)",
+            (goal_id, name)
+        )
+        conn.commit()
 
 def delete_goal(goal_id):
-    conn = get_connection()
-    cur = conn.cursor()
+    with get_connection() as conn:
+        cur = conn.cursor()
 
-    # delete sub-goals first
-    cur.execute("DELETE FROM sub_goals WHERE goal_id=?", (goal_id,))
-    cur.execute("DELETE FROM goals WHERE id=?", (goal_id,))
+        # delete sub-goals first
+        cur.execute("DELETE FROM sub_goals WHERE goal_id=?", (goal_id,))
+        cur.execute("DELETE FROM goals WHERE id=?", (goal_id,))
 
-    conn.commit()
+        conn.commit()
 
 def delete_sub_goal(sub_goal_id):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "UPDATE sub_goals SET active=0 WHERE id=?",
-        (sub_goal_id,)
-    )
-    conn.commit()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE sub_goals SET active=0 WHERE id=?",
+            (sub_goal_id,)
+        )
+        conn.commit()
 
 def get_goals(user_id):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    goals = cur.execute(
-        "SELECT id, name FROM goals WHERE user_id=?",
-        (user_id,)
-    ).fetchall()
+    """
+    Load the user's goal -> sub-goal tree in one query.
 
-    result = []
-    for g in goals:
-        subs = cur.execute(
+    Returns a tuple of GoalNode(goal, subs); each node still unpacks as
+    `for goal, subs in goals`, with goal = (id, name) and subs a tuple of
+    (id, name).
+    """
+    with get_connection() as conn:
+        rows = conn.execute(
             """
-            SELECT id, name FROM sub_goals
-            WHERE goal_id=? AND active=1
+            SELECT g.id, g.name, s.id, s.name
+            FROM goals g
+            LEFT JOIN sub_goals s ON s.goal_id = g.id AND s.active = 1
+            WHERE g.user_id = ?
+            ORDER BY g.id, s.id
             """,
-            (g[0],)
+            (user_id,)
         ).fetchall()
-        result.append((g, subs))
 
-    return result
+    result = []
+    goal = subs = None
+    for goal_id, goal_name, sub_id, sub_name in rows:
+        if goal is None or goal.id != goal_id:
+            if goal is not None:
+                result.append(GoalNode(goal, tuple(subs)))
+            goal, subs = Goal(goal_id, goal_name), []
+        if sub_id is not None:
+            subs.append(SubGoal(sub_id, sub_name))
+    if goal is not None:
+        result.append(GoalNode(goal, tuple(subs)))
 
+    return tuple(result)
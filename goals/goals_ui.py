@@ -3,10 +3,9 @@ from goals.goals_service import (
     add_goal,
     add_sub_goal,
     delete_goal,
-    delete_sub_goal,
-    get_goals
+    delete_sub_goal
 )
-from utils.session import require_login
+from utils.session import require_login, user_context
 
 def render():
     require_login()
@@ -30,7 +29,7 @@ def render():
     # ------------------------
     # Existing Goals
     # ------------------------
-    goals = get_goals(user_id)
+    goals = user_context().goals
 
     if not goals:
         st.info("No goals added yet.")
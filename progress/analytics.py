@@ -1,14 +1,28 @@
 import pandas as pd
 import numpy as np
 from database.db import get_connection
+from utils.dates import to_key
+from utils.instrument import timed
 
 # =====================================================
 # DATA LOADING (DUPLICATE-SAFE BY DESIGN)
 # =====================================================
-def load_data(user_id):
-    conn = get_connection()
-    df = pd.read_sql(
-        """
+@timed
+def parse_dates(values):
+    """ISO 'YYYY-MM-DD' strings -> datetime64[s], parsed in one vectorized pass."""
+    return pd.to_datetime(values, format="%Y-%m-%d").astype("datetime64[s]")
+
+
+@timed
+def load_data(user_id, since=None, until=None):
+    """
+    The user's active check-in history, one row per (sub-goal, day).
+
+    Stored compactly: goal/sub_goal as categoricals, completed as int8
+    and date as datetime64[s]. `since`/`until` (inclusive, date or ISO
+    string) are applied in SQL.
+    """
+    sql = """
         SELECT
             d.date,
             d.completed,
@@ -18,17 +32,88 @@ def load_data(user_id):
         JOIN sub_goals s ON d.sub_goal_id = s.id
         JOIN goals g ON s.goal_id = g.id
         WHERE active=1 AND g.user_id = ?
-        """,
-        conn,
-        params=(user_id,)
-    )
-    df["date"] = pd.to_datetime(df["date"])
+    """
+    params = [user_id]
+    if since is not None:
+        sql += " AND d.date >= ?"
+        params.append(to_key(since))
+    if until is not None:
+        sql += " AND d.date <= ?"
+        params.append(to_key(until))
+
+    with get_connection() as conn:
+        df = pd.read_sql(sql, conn, params=params)
+
+    df["date"] = parse_dates(df["date"])
+    df["completed"] = df["completed"].fillna(0).astype("int8")
+    df["goal"] = df["goal"].astype("category")
+    df["sub_goal"] = df["sub_goal"].astype("category")
     return df
 
 
+@timed
+def load_daily(user_id, goal=None, sub_goal=None, since=None, last=None):
+    """
+    Per-day completion ratio for a Focus scope, oldest day first.
+
+    Overall and goal scopes read the daily_summary rollups; a single
+    sub-goal reads daily_logs, which already has one row per day. Returns
+    the same `date`/`completed` columns as load_data, so the time-series
+    metrics below work on it unchanged. `since` bounds the window by date
+    and `last` keeps only the most recent N logged days.
+    """
+    if sub_goal is not None:
+        sql = """
+            SELECT d.date AS date, AVG(d.completed) AS completed
+            FROM daily_logs d
+            JOIN sub_goals s ON d.sub_goal_id = s.id
+            JOIN goals g ON s.goal_id = g.id
+            WHERE s.active = 1 AND g.user_id = ? AND g.name = ? AND s.name = ?
+        """
+        params = [user_id, goal, sub_goal]
+        date_col, group = "d.date", " GROUP BY d.date"
+    elif goal is not None:
+        sql = """
+            SELECT ds.date AS date, SUM(ds.done) * 1.0 / SUM(ds.total) AS completed
+            FROM goal_daily_summary ds
+            JOIN goals g ON ds.goal_id = g.id
+            WHERE ds.user_id = ? AND g.name = ?
+        """
+        params = [user_id, goal]
+        date_col, group = "ds.date", " GROUP BY ds.date"
+    else:
+        sql = """
+            SELECT date, done * 1.0 / total AS completed
+            FROM daily_summary
+            WHERE user_id = ?
+        """
+        params = [user_id]
+        date_col, group = "date", ""
+
+    if since is not None:
+        sql += f" AND {date_col} >= ?"
+        params.append(to_key(since))
+    sql += group
+
+    if last is not None:
+        sql += " ORDER BY date DESC LIMIT ?"
+        params.append(last)
+    else:
+        sql += " ORDER BY date"
+
+    with get_connection() as conn:
+        daily = pd.read_sql(sql, conn, params=params)
+
+    if last is not None:
+        daily = daily.iloc[::-1].reset_index(drop=True)
+    daily["date"] = parse_dates(daily["date"])
+    return daily
+
+
 # =====================================================
 # STAGE ENGINE (NO HARD LOCKS)
 # =====================================================
+@timed
 def get_stage(days):
     if days < 3:
         return "identity"
@@ -45,14 +130,17 @@ def get_stage(days):
 # =====================================================
 # CORE METRICS
 # =====================================================
+@timed
 def active_days(df):
     return df["date"].dt.date.nunique()
 
 
+@timed
 def completion_rate(df):
     return round(df["completed"].mean() * 100, 1) if not df.empty else 0
 
 
+@timed
 def daily_completion(df):
     return (
         df.groupby("date")["completed"]
@@ -62,9 +150,15 @@ def daily_completion(df):
     )
 
 
+@timed
+def goal_contribution(df):
+    return df.groupby("goal", observed=True)["completed"].sum().to_dict()
+
+
 # =====================================================
 # SCORES
 # =====================================================
+@timed
 def goal_scores(df):
     if df.empty:
         return {}
@@ -73,7 +167,7 @@ def goal_scores(df):
     temp["completed"] = pd.to_numeric(temp["completed"], errors="coerce").fillna(0)
 
     return (
-        temp.groupby("goal")["completed"]
+        temp.groupby("goal", observed=True)["completed"]
         .mean()
         .mul(100)
         .round()
@@ -83,6 +177,7 @@ def goal_scores(df):
 
 
 
+@timed
 def habit_scores(df):
     if df.empty:
         return {}
@@ -91,7 +186,7 @@ def habit_scores(df):
     temp["completed"] = pd.to_numeric(temp["completed"], errors="coerce").fillna(0)
 
     return (
-        temp.groupby("sub_goal")["completed"]
+        temp.groupby("sub_goal", observed=True)["completed"]
         .mean()
         .mul(100)
         .round()
@@ -126,29 +221,76 @@ def _streak_calc(dates):
     return curr, best
 
 
+@timed
 def habit_streaks(df):
-    out = {}
-    for h, hdf in df[df["completed"] == 1].groupby("sub_goal"):
-        dates = sorted(hdf["date"].dt.date.unique())
-        out[h] = _streak_calc(dates)
-    return out
+    """
+    {sub_goal: (current, best)} for every habit, computed in one pass.
+
+    Same results as running _streak_calc on each habit's sorted unique
+    completion dates: completed days become integer ordinals, runs of
+    consecutive days are found with a diff, and run lengths are reduced
+    per habit (best = longest run, current = the habit's last run).
+    """
+    done = df[df["completed"] == 1]
+    if done.empty:
+        return {}
+
+    codes, names = pd.factorize(done["sub_goal"], sort=True)
+    days = done["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+
+    order = np.lexsort((days, codes))
+    codes, days = codes[order], days[order]
+
+    # One entry per (habit, day)
+    keep = np.ones(len(days), dtype=bool)
+    keep[1:] = (codes[1:] != codes[:-1]) | (days[1:] != days[:-1])
+    codes, days = codes[keep], days[keep]
+
+    # A run starts at every habit boundary or gap of more than one day
+    starts = np.ones(len(days), dtype=bool)
+    starts[1:] = (codes[1:] != codes[:-1]) | (np.diff(days) != 1)
+    run_len = np.diff(np.append(np.flatnonzero(starts), len(days)))
+    run_habit = codes[starts]
+
+    # Runs are grouped by habit: first/last run of each habit
+    first = np.flatnonzero(np.r_[True, run_habit[1:] != run_habit[:-1]])
+    last = np.append(first[1:], len(run_len)) - 1
+
+    best = np.maximum.reduceat(run_len, first)
+    curr = run_len[last]
+
+    return {
+        names[h]: (int(c), int(b))
+        for h, c, b in zip(run_habit[first], curr, best)
+    }
 
 
 # =====================================================
-# MOMENTUM & RISK
+# DAILY SERIES
 # =====================================================
-def momentum(df, window):
-    daily = df.groupby("date")["completed"].mean()
-    return daily.tail(window).mean() if len(daily) >= window else None
+# Every time-series metric below starts from the same per-day completion
+# ratios. daily_rates() is the one group-by; the *_from_rates functions
+# take that array (or a load_daily() "completed" column) so a caller that
+# needs several of them computes the series once.
+@timed
+def daily_rates(df):
+    """Per-day completion ratios, oldest first, as a float array."""
+    return df.groupby("date")["completed"].mean().sort_index().to_numpy(dtype=np.float64)
 
 
-def risk_signal(df):
-    daily = df.groupby("date")["completed"].mean().sort_index()
-    if len(daily) < 10:
+def tail_means(rates, windows):
+    """Mean of the last w values for each window (None if too short)."""
+    tail_sums = np.cumsum(rates[::-1])
+    return [tail_sums[w - 1] / w if len(rates) >= w else None for w in windows]
+
+
+def risk_from_rates(rates):
+    if len(rates) < 10:
         return "Too early"
 
-    short = daily.tail(7).mean()
-    long = daily.tail(21).mean() if len(daily) >= 21 else daily.mean()
+    short, long = tail_means(rates, (7, 21))
+    if long is None:
+        long = rates.mean()
 
     if short < 0.4:
         return "High Risk"
@@ -157,16 +299,55 @@ def risk_signal(df):
     return "Stable"
 
 
+def trend_from_rates(rates):
+    n = len(rates)
+    return trend_from_sums(n, float(rates.sum()), float(np.arange(n) @ rates))
+
+
+def perfect_from_rates(rates):
+    return int((rates == 1).sum()), len(rates)
+
+
+@timed
+def recent_insights(rates):
+    """(7-day momentum, 21-day momentum, risk) from one daily series."""
+    m7, m21 = tail_means(rates, (7, 21))
+    return m7, m21, risk_from_rates(rates)
+
+
+# =====================================================
+# MOMENTUM & RISK
+# =====================================================
+@timed
+def momentum(df, window):
+    return tail_means(daily_rates(df), (window,))[0]
+
+
+@timed
+def risk_signal(df):
+    return risk_from_rates(daily_rates(df))
+
+
 # =====================================================
 # BEHAVIORAL INSIGHTS (HIGH SIGNAL)
 # =====================================================
+@timed
 def consistency_trend(df):
-    daily = df.groupby("date")["completed"].mean()
-    if len(daily) < 7:
+    return trend_from_rates(daily_rates(df))
+
+
+@timed
+def trend_from_sums(n, sum_y, sum_xy):
+    """
+    consistency_trend() from running sums over a daily series y at
+    x = 0..n-1, using the closed-form least-squares slope.
+    """
+    if n < 7:
         return None
 
-    x = np.arange(len(daily))
-    slope = np.polyfit(x, daily.values, 1)[0]
+    sum_x = n * (n - 1) / 2
+    sum_xx = (n - 1) * n * (2 * n - 1) / 6
+    slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x ** 2)
 
     if slope > 0.01:
         return "Improving"
@@ -175,18 +356,20 @@ def consistency_trend(df):
     return "Stable"
 
 
+@timed
 def fragile_habit(df):
-    rates = df.groupby("sub_goal")["completed"].mean()
+    rates = df.groupby("sub_goal", observed=True)["completed"].mean()
     if rates.empty:
         return None
     return rates.idxmin(), int(rates.min() * 100)
 
 
+@timed
 def perfect_days(df):
-    daily = df.groupby("date")["completed"].mean()
-    return int((daily == 1).sum()), len(daily)
+    return perfect_from_rates(daily_rates(df))
 
 
+@timed
 def weekday_pattern(df):
     temp = df.copy()
     temp["weekday"] = temp["date"].dt.day_name()
@@ -194,78 +377,3 @@ def weekday_pattern(df):
     if len(by_day) < 5:
         return None
     return by_day.idxmax(), by_day.idxmin()
-
-
-def has_completion_today(user_id, today):
-    from database.db import get_connection
-
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        SELECT 1
-        FROM daily_logs d
-        JOIN sub_goals s ON d.sub_goal_id = s.id
-        JOIN goals g ON s.goal_id = g.id
-        WHERE g.user_id = ?
-          AND d.date = ?
-          AND d.completed = 1
-        LIMIT 1
-        """,
-        (user_id, today)
-    )
-
-    return cur.fetchone() is not None
-
-def is_grace_day(user_id, today):
-    from database.db import get_connection
-
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # Earliest day user ever completed anything
-    cur.execute(
-        """
-        SELECT MIN(d.date)
-        FROM daily_logs d
-        JOIN sub_goals s ON d.sub_goal_id = s.id
-        JOIN goals g ON s.goal_id = g.id
-        WHERE g.user_id = ?
-          AND d.completed = 1
-        """,
-        (user_id,)
-    )
-
-    row = cur.fetchone()
-    if row is None or row[0] is None:
-        return False
-
-    return row[0] == today
-
-def has_any_completion(user_id):
-    """
-    Returns True if the user has EVER completed at least one habit.
-    Used ONLY for Day-0 detection.
-    """
-    from database.db import get_connection
-
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        SELECT 1
-        FROM daily_logs d
-        JOIN sub_goals s ON d.sub_goal_id = s.id
-        JOIN goals g ON s.goal_id = g.id
-        WHERE g.user_id = ?
-          AND d.completed = 1
-        LIMIT 1
-        """,
-        (user_id,)
-    )
-
-    return cur.fetchone() is not None
-
-
@@ -0,0 +1,107 @@
+from config import ANALYTICS_BACKEND
+from progress import analytics, history, sql_backend
+from progress.snapshot import get_snapshot
+
+# A scope is the Focus selection: (goal, sub_goal), None meaning "all".
+OVERALL = (None, None)
+
+# Momentum and risk never look further back than this many logged days.
+RECENT_DAYS = 21
+
+
+class PandasBackend:
+    """
+    Metrics computed in Python.
+
+    Long-horizon metrics come from the incrementally extended History;
+    anything it cannot answer falls back to the snapshot's full frame.
+    """
+
+    def __init__(self, snap):
+        self.snap = snap
+        self.user_id = snap.user_id
+
+    def history(self):
+        return self.snap.memo(("history",), lambda: history.get_history(self.user_id))
+
+    def options(self):
+        """{goal: sorted sub-goal names} for the Focus selectboxes, built once."""
+        def build():
+            tree = {}
+            for goal, sub_goal in self.history().habits:
+                tree.setdefault(goal, []).append(sub_goal)
+            return {goal: sorted(subs) for goal, subs in sorted(tree.items())}
+
+        return self.snap.memo(("options",), build)
+
+    def goal_options(self):
+        return list(self.options())
+
+    def sub_goal_options(self, goal):
+        return self.options().get(goal, [])
+
+    def frame(self, scope):
+        goal, sub_goal = scope
+        df = self.snap.df
+        if goal is None:
+            return df
+        if sub_goal is None:
+            return self.snap.memo(("frame", scope), lambda: df[df["goal"] == goal])
+        return self.snap.memo(
+            ("frame", scope),
+            lambda: df[(df["goal"] == goal) & (df["sub_goal"] == sub_goal)]
+        )
+
+    def metric(self, name, scope):
+        if name in history.METRICS:
+            fn = getattr(history, name)
+            value = self.snap.memo((name, scope), lambda: fn(self.history(), scope))
+            # habit_streaks gives up when two habits share a name
+            if value is not None or name != "habit_streaks":
+                return value
+
+        fn = getattr(analytics, name)
+        return self.snap.memo(("frame", name, scope), lambda: fn(self.frame(scope)))
+
+    def recent(self, scope):
+        """
+        Completion ratios of the last RECENT_DAYS logged days, oldest first:
+        the one daily series momentum and risk are computed from.
+        """
+        return self.snap.memo(
+            ("recent", scope),
+            lambda: analytics.load_daily(
+                self.user_id, *scope, last=RECENT_DAYS
+            )["completed"].to_numpy(dtype=float)
+        )
+
+    def insights(self, scope):
+        """(7-day momentum, 21-day momentum, risk) for a scope."""
+        return self.snap.memo(
+            ("insights", scope), lambda: analytics.recent_insights(self.recent(scope))
+        )
+
+
+class SqlBackend(PandasBackend):
+    """Same interface, every metric pushed down as a GROUP BY query."""
+
+    def goal_options(self):
+        return self.snap.memo(
+            ("goals",), lambda: sql_backend.goal_options(self.user_id)
+        )
+
+    def sub_goal_options(self, goal):
+        return self.snap.memo(
+            ("sub_goals", goal), lambda: sql_backend.sub_goal_options(self.user_id, goal)
+        )
+
+    def metric(self, name, scope):
+        fn = getattr(sql_backend, name)
+        return self.snap.memo((name, scope), lambda: fn(self.user_id, *scope))
+
+
+def get_backend(user_id, versions=None):
+    snap = get_snapshot(user_id, versions)
+    if ANALYTICS_BACKEND == "sql":
+        return SqlBackend(snap)
+    return PandasBackend(snap)
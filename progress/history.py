@@ -0,0 +1,313 @@
+"""
+Long-horizon Progress aggregates, extended incrementally with new days.
+
+A History holds per-habit totals (completion counts, weekday counts,
+streak state) and per-scope day-level sums (active days, perfect days,
+trend regression sums). It is built once from the user's full history
+and afterwards only folds in days that have become final since the last
+call. Today is still editable, so it is folded into a throwaway copy
+on every refresh instead of into the cached History.
+
+The cached History is rebuilt from scratch when the user's goals change
+(activating/deactivating sub-goals changes which rows count) or when
+check-ins in a month before the last folded one were written (see
+versions.touched). It also keeps a copy of itself as of the end of the
+previous month, so an edit inside the current month (the common case:
+today's check-ins) only refolds that month.
+"""
+import copy
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import HISTORY_CACHE_USERS
+from progress.analytics import load_data, trend_from_sums
+from utils.versions import current, touched
+
+# Monday = 0, matching (day ordinal + 3) % 7 since 1970-01-01 was a Thursday
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+class HabitTotals:
+    __slots__ = ("done", "total", "wd_done", "wd_total", "best", "run", "last_day")
+
+    def __init__(self):
+        self.done = 0
+        self.total = 0
+        self.wd_done = np.zeros(7, dtype=np.int64)
+        self.wd_total = np.zeros(7, dtype=np.int64)
+        self.best = 0
+        self.run = 0
+        self.last_day = None
+
+    def extend_streak(self, days):
+        """Fold sorted, unique completed day ordinals newer than last_day."""
+        if not len(days):
+            return
+
+        starts = np.flatnonzero(np.r_[True, np.diff(days) != 1])
+        lengths = np.diff(np.append(starts, len(days)))
+        if self.last_day is not None and days[0] == self.last_day + 1:
+            lengths[0] += self.run
+
+        self.best = max(self.best, int(lengths.max()))
+        self.run = int(lengths[-1])
+        self.last_day = int(days[-1])
+
+
+class DayTotals:
+    __slots__ = ("days", "perfect", "sum_y", "sum_xy")
+
+    def __init__(self):
+        self.days = 0
+        self.perfect = 0
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+
+    def extend(self, ratios):
+        """Fold the next days' completion ratios, oldest first."""
+        x = np.arange(self.days, self.days + len(ratios))
+        self.days += len(ratios)
+        self.perfect += int((ratios == 1).sum())
+        self.sum_y += float(ratios.sum())
+        self.sum_xy += float((x * ratios).sum())
+
+
+class History:
+    def __init__(self, goals_version):
+        self.goals_version = goals_version
+        self.through = None         # last folded day (ISO), None = nothing yet
+        self.seen = {}              # touched() counters already folded in
+        self.habits = {}            # (goal, sub_goal) -> HabitTotals
+        self.scopes = {}            # (goal, sub_goal) scope -> DayTotals
+
+    def fold(self, df):
+        """Fold a load_data() frame covering whole days after `through`."""
+        if df.empty:
+            return
+
+        days = df["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        completed = df["completed"].to_numpy().astype(np.int64)
+        weekday = (days + 3) % 7
+
+        for key, idx in df.groupby(["goal", "sub_goal"], observed=True).indices.items():
+            habit = self.habits.get(key)
+            if habit is None:
+                habit = self.habits[key] = HabitTotals()
+
+            done = completed[idx]
+            habit.done += int(done.sum())
+            habit.total += len(idx)
+            habit.wd_done += np.bincount(weekday[idx], weights=done, minlength=7).astype(np.int64)
+            habit.wd_total += np.bincount(weekday[idx], minlength=7)
+            habit.extend_streak(np.unique(days[idx][done == 1]))
+
+        frame = pd.DataFrame({
+            "day": days,
+            "completed": completed,
+            "goal": df["goal"].to_numpy(),
+            "sub_goal": df["sub_goal"].to_numpy(),
+        })
+        self._fold_scope((None, None), frame.groupby("day")["completed"].mean())
+        for goal, rows in frame.groupby("goal"):
+            self._fold_scope((goal, None), rows.groupby("day")["completed"].mean())
+            for sub_goal, sub_rows in rows.groupby("sub_goal"):
+                self._fold_scope((goal, sub_goal), sub_rows.groupby("day")["completed"].mean())
+
+    def _fold_scope(self, scope, daily):
+        totals = self.scopes.get(scope)
+        if totals is None:
+            totals = self.scopes[scope] = DayTotals()
+        totals.extend(daily.sort_index().to_numpy())
+
+    def select(self, scope):
+        goal, sub_goal = scope
+        return [
+            (key, habit) for key, habit in sorted(self.habits.items())
+            if (goal is None or key[0] == goal)
+            and (sub_goal is None or key[1] == sub_goal)
+        ]
+
+    def day_totals(self, scope):
+        return self.scopes.get(scope) or DayTotals()
+
+
+# =====================================================
+# CACHE
+# =====================================================
+_lock = threading.Lock()
+_histories = OrderedDict()     # user_id -> (History, its copy as of the previous month's end)
+
+
+def _day_before(day):
+    return (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+
+
+def _advance(history, base, user_id, sealed):
+    """
+    Fold the days after history.through up to sealed. Returns the base:
+    a copy of the History as of the end of the month before sealed's.
+    """
+    since = None if history.through is None else (
+        date.fromisoformat(history.through) + timedelta(days=1)
+    ).isoformat()
+    month_start = sealed[:8] + "01"
+
+    if since is None or since < month_start:
+        history.fold(load_data(user_id, since=since, until=_day_before(month_start)))
+        history.through = _day_before(month_start)
+        base = copy.deepcopy(history)
+        since = month_start
+
+    history.fold(load_data(user_id, since=since, until=sealed))
+    history.through = sealed
+    return base
+
+
+def get_history(user_id):
+    """The user's History including today (a copy; safe to read freely)."""
+    today = date.today()
+    sealed = (today - timedelta(days=1)).isoformat()
+    goals_version = current(user_id, "goals")
+    # Taken before loading: a write racing the load dirties it again.
+    touches = touched(user_id)
+
+    with _lock:
+        history, base = _histories.get(user_id, (None, None))
+
+    dirty = history and min(
+        (m for m, n in touches.items()
+         if history.seen.get(m) != n and m <= history.through[:7]),
+        default=None
+    )
+    if history is None or history.goals_version != goals_version or (
+        dirty and dirty < history.through[:7]
+    ):
+        history = History(goals_version)
+        base = _advance(history, None, user_id, sealed)
+    elif dirty:
+        # Only the last folded month changed: refold it from the base.
+        history = copy.deepcopy(base)
+        base = _advance(history, base, user_id, sealed)
+    elif history.through < sealed:
+        history = copy.deepcopy(history)
+        base = _advance(history, base, user_id, sealed)
+    elif history.seen != touches:
+        history = copy.copy(history)
+    history.seen = touches
+
+    with _lock:
+        _histories[user_id] = (history, base)
+        _histories.move_to_end(user_id)
+        while len(_histories) > HISTORY_CACHE_USERS:
+            _histories.popitem(last=False)
+
+    live = copy.deepcopy(history)
+    live.fold(load_data(user_id, since=today))
+    return live
+
+
+# =====================================================
+# METRICS (same results as the analytics.py versions)
+# =====================================================
+def active_days(history, scope):
+    return history.day_totals(scope).days
+
+
+def perfect_days(history, scope):
+    totals = history.day_totals(scope)
+    return totals.perfect, totals.days
+
+
+def consistency_trend(history, scope):
+    totals = history.day_totals(scope)
+    return trend_from_sums(totals.days, totals.sum_y, totals.sum_xy)
+
+
+def completion_rate(history, scope):
+    habits = [h for _, h in history.select(scope)]
+    total = sum(h.total for h in habits)
+    if not total:
+        return 0
+    return round(sum(h.done for h in habits) / total * 100, 1)
+
+
+def _by(history, scope, position):
+    """Sum (done, total) per goal (position 0) or per sub-goal name (1)."""
+    out = {}
+    for key, habit in history.select(scope):
+        done, total = out.get(key[position], (0, 0))
+        out[key[position]] = (done + habit.done, total + habit.total)
+    return dict(sorted(out.items()))
+
+
+def goal_contribution(history, scope):
+    return {goal: done for goal, (done, _) in _by(history, scope, 0).items()}
+
+
+def goal_scores(history, scope):
+    return {
+        goal: int(round(done / total * 100))
+        for goal, (done, total) in _by(history, scope, 0).items()
+    }
+
+
+def habit_scores(history, scope):
+    return {
+        name: int(round(done / total * 100))
+        for name, (done, total) in _by(history, scope, 1).items()
+    }
+
+
+def fragile_habit(history, scope):
+    rates = [(name, done / total) for name, (done, total) in _by(history, scope, 1).items()]
+    if not rates:
+        return None
+    name, rate = min(rates, key=lambda r: r[1])
+    return name, int(rate * 100)
+
+
+def weekday_pattern(history, scope):
+    done = np.zeros(7, dtype=np.int64)
+    total = np.zeros(7, dtype=np.int64)
+    for _, habit in history.select(scope):
+        done += habit.wd_done
+        total += habit.wd_total
+
+    rates = sorted(
+        (WEEKDAYS[day], done[day] / total[day]) for day in range(7) if total[day]
+    )
+    if len(rates) < 5:
+        return None
+    return max(rates, key=lambda r: r[1])[0], min(rates, key=lambda r: r[1])[0]
+
+
+def habit_streaks(history, scope):
+    """
+    {sub_goal: (current, best)}, or None when two selected habits share a
+    name (analytics.habit_streaks merges their dates; use the frame then).
+    """
+    out = {}
+    for (_, name), habit in history.select(scope):
+        if name in out:
+            return None
+        if habit.best:
+            out[name] = (habit.run, habit.best)
+    return dict(sorted(out.items()))
+
+
+METRICS = {
+    "active_days",
+    "perfect_days",
+    "consistency_trend",
+    "completion_rate",
+    "goal_contribution",
+    "goal_scores",
+    "habit_scores",
+    "fragile_habit",
+    "weekday_pattern",
+    "habit_streaks",
+}
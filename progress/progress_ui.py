@@ -1,37 +1,11 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from progress.analytics import (
-    load_data,
-    get_stage,
-    completion_rate,
-    daily_completion,
-    goal_scores,
-    habit_scores,
-    habit_streaks,
-    momentum,
-    risk_signal,
-    consistency_trend,
-    fragile_habit,
-    perfect_days,
-    weekday_pattern,
-    is_grace_day
-
-)
-from utils.session import require_login
+from progress.analytics import get_stage
+from utils.session import require_login, user_context
 from datetime import date
-from progress.analytics import has_completion_today
-from progress.analytics import has_any_completion
-
-# =====================================================
-# FILTER HELPER
-# =====================================================
-def apply_filter(df, view, goal=None, sub_goal=None):
-    if view == "Main Goal":
-        return df[df["goal"] == goal]
-    if view == "Sub-goal":
-        return df[(df["goal"] == goal) & (df["sub_goal"] == sub_goal)]
-    return df
+from progress.backends import OVERALL, get_backend
+from progress.tiles import heatmap_grid
 
 
 def render():
@@ -39,20 +13,17 @@ def render():
 
     st.header("🎮 Progress & Insights")
 
-    df = load_data(st.session_state.user_id)
-
-    
-
-    
-
-    completed = df[df["completed"] == 1]
-
-    
+    user_id = st.session_state.user_id
 
-    
+    # Served from memory until the user writes new data; one versions
+    # read for the whole rerun.
+    ctx = user_context()
+    backend = get_backend(user_id, ctx.versions)
+    snap = backend.snap
 
     today = date.today().isoformat()
-    grace = is_grace_day(st.session_state.user_id, today)
+    first = ctx.milestones.first
+    grace = first == today
 
 
     # -------------------------------------------------
@@ -60,7 +31,7 @@ def render():
     # -------------------------------------------------
     today = date.today().isoformat()
 
-    if not has_any_completion(st.session_state.user_id):
+    if first is None:
         st.subheader("🚀 Day 0")
         st.info(
             "Welcome! This is your starting line.\n\n"
@@ -72,14 +43,14 @@ def render():
 
 
 
-    total_days = df["date"].dt.date.nunique()
+    total_days = backend.metric("active_days", OVERALL)
     stage = get_stage(total_days)
 
 
     # -------------------------------------------------
     # FILTERS
     # -------------------------------------------------
-    days_active = df["date"].dt.date.nunique()
+    days_active = total_days
 
     if days_active >= 14:
         st.subheader("🎯 Focus")
@@ -93,20 +64,20 @@ def render():
         goal = sub_goal = None
 
         if view in ["Main Goal", "Sub-goal"]:
-            goal = st.selectbox("Goal", sorted(df["goal"].unique()))
+            goal = st.selectbox("Goal", backend.goal_options())
 
         if view == "Sub-goal":
-            sub_goal = st.selectbox(
-                "Sub-goal",
-                sorted(df[df["goal"] == goal]["sub_goal"].unique())
-            )
-
-        df_f = apply_filter(df, view, goal, sub_goal)
+            sub_goal = st.selectbox("Sub-goal", backend.sub_goal_options(goal))
 
     else:
-        df_f = df
+        goal = sub_goal = None
         st.caption("🔓 Detailed filters unlock after 14 days of consistency.")
 
+    scope = (goal, sub_goal)
+
+    # Momentum and risk only need the last few weeks
+    m7, m21, risk = backend.insights(scope)
+
     # -------------------------------------------------
     # TOP SUMMARY
     # -------------------------------------------------
@@ -124,22 +95,19 @@ def render():
         )
 
     else:
-        total_days = df["date"].dt.date.nunique()
-        stage = get_stage(total_days)
-
         c1.metric("Active Days", total_days)
-        c2.metric("Consistency", f"{completion_rate(df_f)}%")
+        c2.metric("Consistency", f"{backend.metric('completion_rate', scope)}%")
         c3.metric("Stage", stage.capitalize())
 
     # -------------------------------------------------
     # DONUT — GOAL CONTRIBUTION
     # -------------------------------------------------
     st.subheader("🏹 Goal Contribution")
+    contribution = backend.metric("goal_contribution", scope)
     st.plotly_chart(
         px.pie(
-            df_f,
-            values="completed",
-            names="goal",
+            values=list(contribution.values()),
+            names=list(contribution.keys()),
             hole=0.6
         ),
         use_container_width=True
@@ -149,7 +117,7 @@ def render():
     # HABIT RELIABILITY
     # -------------------------------------------------
     st.subheader("📊 Habit Reliability")
-    hs = habit_scores(df_f)
+    hs = backend.metric("habit_scores", scope)
     if hs:
         st.plotly_chart(
             px.bar(
@@ -165,16 +133,9 @@ def render():
     # -------------------------------------------------
     if stage in ["consistency", "momentum", "mastery"]:
         st.subheader("🗓 Consistency Map")
-        heat = daily_completion(df_f)
-        heat["day"] = heat["date"].dt.day
-        heat["month"] = heat["date"].dt.strftime("%b")
-
-        pivot = heat.pivot_table(
-            index="month",
-            columns="day",
-            values="completed",
-            aggfunc="mean"
-        ).fillna(0)
+        pivot = snap.memo(
+            ("heatmap", scope), lambda: heatmap_grid(backend.user_id, scope)
+        )
 
         st.plotly_chart(
             px.imshow(
@@ -189,8 +150,7 @@ def render():
     # -------------------------------------------------
     if stage in ["momentum", "mastery"]:
         st.subheader("📈 Momentum")
-        m7 = momentum(df_f, 7)
-        m21 = momentum(df_f, 21) or 0
+        m21 = m21 or 0
 
         st.plotly_chart(
             px.bar(
@@ -205,7 +165,8 @@ def render():
     # -------------------------------------------------
     st.divider()
     st.subheader("🔥 Habit Streaks")
-    for h, (cur, best) in habit_streaks(df_f).items():
+    streaks = backend.metric("habit_streaks", scope)
+    for h, (cur, best) in streaks.items():
         st.write(f"**{h}** → Current: {cur} | Best: {best}")
 
     # -------------------------------------------------
@@ -214,22 +175,22 @@ def render():
     st.divider()
     st.subheader("🧠 Behavioral Insights")
 
-    trend = consistency_trend(df_f)
+    trend = backend.metric("consistency_trend", scope)
     if trend:
         st.info(f"Consistency trend: **{trend}**")
 
-    fragile = fragile_habit(df_f)
+    fragile = backend.metric("fragile_habit", scope)
     if fragile:
         st.warning(f"Weakest habit: **{fragile[0]}** ({fragile[1]}%)")
 
-    p, total = perfect_days(df_f)
+    p, total = backend.metric("perfect_days", scope)
     st.metric("Perfect Days", f"{p} / {total}")
 
-    weekday = weekday_pattern(df_f)
+    weekday = backend.metric("weekday_pattern", scope)
     if weekday:
         st.info(
             f"You perform best on **{weekday[0]}s** and struggle most on **{weekday[1]}s**."
         )
 
     st.subheader("⚠️ Risk Signal")
-    st.info(risk_signal(df_f))
+    st.info(risk)
@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from config import SNAPSHOT_CACHE_ENTRIES, SNAPSHOT_CACHE_MB
+from progress.analytics import load_data
+from utils.versions import read
+
+# Writes to these domains change what the Progress page shows.
+DOMAINS = ("goals", "checkins")
+
+
+def _nbytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    return 0
+
+
+# =====================================================
+# SNAPSHOT
+# =====================================================
+class Snapshot:
+    """
+    Everything the Progress page derives from one version of a user's data.
+
+    `df` is load_data() for that version, loaded on first access (the SQL
+    backend never touches it); memo() caches anything computed for the
+    version (filtered frames, scores, streaks, heatmap grids) so reruns
+    that only move a widget reuse the earlier results.
+    """
+
+    def __init__(self, user_id, version):
+        self.user_id = user_id
+        self.version = version
+        self.nbytes = 0
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @property
+    def df(self):
+        return self.memo(("df",), lambda: load_data(self.user_id))
+
+    def memo(self, key, compute):
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+
+        value = compute()
+
+        with self._lock:
+            if key not in self._memo:
+                self._memo[key] = value
+                self.nbytes += _nbytes(value)
+            return self._memo[key]
+
+
+# =====================================================
+# LRU CACHE
+# =====================================================
+class SnapshotCache:
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id, versions=None):
+        if versions is None:
+            versions = read(user_id)
+        key = (user_id, tuple(versions[domain] for domain in DOMAINS))
+
+        with self._lock:
+            snap = self._entries.get(key)
+            if snap is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return snap
+            self.misses += 1
+
+        snap = Snapshot(user_id, key[1])
+
+        with self._lock:
+            # Older versions for this user can never be hit again.
+            for stale in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[stale]
+                self.evictions += 1
+            self._entries[key] = snap
+            self._evict()
+        return snap
+
+    def _evict(self):
+        # Memoized values grow snapshots after insertion, so the byte
+        # budget is re-checked on every lookup that inserts.
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or sum(s.nbytes for s in self._entries.values()) > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": sum(s.nbytes for s in self._entries.values()),
+            }
+
+
+_cache = SnapshotCache(SNAPSHOT_CACHE_ENTRIES, SNAPSHOT_CACHE_MB * 1024 * 1024)
+
+
+def get_snapshot(user_id, versions=None):
+    """The user's Snapshot; `versions` (a versions.read()) saves re-reading them."""
+    return _cache.get(user_id, versions)
+
+
+def snapshot_stats():
+    return _cache.stats()
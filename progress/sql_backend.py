@@ -0,0 +1,269 @@
+"""
+SQL implementations of the analytics.py metrics.
+
+Each function takes (user_id, goal=None, sub_goal=None) instead of a
+DataFrame, runs its GROUP BY inside SQLite and returns the same value
+as the pandas version applied to the equivalently filtered load_data()
+frame. Only the small aggregated result crosses into Python.
+
+    python -m progress.sql_backend          # parity check, all users
+    python -m progress.sql_backend 1 2      # parity check, given users
+"""
+import sys
+
+import pandas as pd
+
+from database.db import get_connection
+from progress.analytics import parse_dates, trend_from_sums
+
+WEEKDAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+BASE = """
+    FROM daily_logs d
+    JOIN sub_goals s ON d.sub_goal_id = s.id
+    JOIN goals g ON s.goal_id = g.id
+    WHERE s.active = 1 AND g.user_id = ?
+"""
+
+
+def _scoped(user_id, goal, sub_goal):
+    where, params = BASE, [user_id]
+    if goal is not None:
+        where += " AND g.name = ?"
+        params.append(goal)
+    if sub_goal is not None:
+        where += " AND s.name = ?"
+        params.append(sub_goal)
+    return where, params
+
+
+def _rows(sql, params):
+    with get_connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def _scores(user_id, goal, sub_goal, column):
+    where, params = _scoped(user_id, goal, sub_goal)
+    rows = _rows(
+        f"SELECT {column}, AVG(d.completed) {where} GROUP BY {column} ORDER BY {column}",
+        params
+    )
+    return {name: int(round(rate * 100)) for name, rate in rows}
+
+
+# =====================================================
+# FOCUS OPTIONS
+# =====================================================
+def goal_options(user_id):
+    where, params = _scoped(user_id, None, None)
+    return [r[0] for r in _rows(f"SELECT DISTINCT g.name {where} ORDER BY g.name", params)]
+
+
+def sub_goal_options(user_id, goal):
+    where, params = _scoped(user_id, goal, None)
+    return [r[0] for r in _rows(f"SELECT DISTINCT s.name {where} ORDER BY s.name", params)]
+
+
+# =====================================================
+# CORE METRICS
+# =====================================================
+def active_days(user_id, goal=None, sub_goal=None):
+    where, params = _scoped(user_id, goal, sub_goal)
+    return _rows(f"SELECT COUNT(DISTINCT d.date) {where}", params)[0][0]
+
+
+def completion_rate(user_id, goal=None, sub_goal=None):
+    where, params = _scoped(user_id, goal, sub_goal)
+    rate = _rows(f"SELECT AVG(d.completed) {where}", params)[0][0]
+    return round(rate * 100, 1) if rate is not None else 0
+
+
+def daily_completion(user_id, goal=None, sub_goal=None):
+    where, params = _scoped(user_id, goal, sub_goal)
+    with get_connection() as conn:
+        daily = pd.read_sql(
+            f"SELECT d.date, AVG(d.completed) AS completed {where} "
+            "GROUP BY d.date ORDER BY d.date",
+            conn,
+            params=params
+        )
+    daily["date"] = parse_dates(daily["date"])
+    return daily
+
+
+def goal_contribution(user_id, goal=None, sub_goal=None):
+    where, params = _scoped(user_id, goal, sub_goal)
+    return dict(_rows(
+        f"SELECT g.name, SUM(d.completed) {where} GROUP BY g.name ORDER BY g.name",
+        params
+    ))
+
+
+# =====================================================
+# SCORES
+# =====================================================
+def goal_scores(user_id, goal=None, sub_goal=None):
+    return _scores(user_id, goal, sub_goal, "g.name")
+
+
+def habit_scores(user_id, goal=None, sub_goal=None):
+    return _scores(user_id, goal, sub_goal, "s.name")
+
+
+# =====================================================
+# STREAKS
+# =====================================================
+def habit_streaks(user_id, goal=None, sub_goal=None):
+    where, params = _scoped(user_id, goal, sub_goal)
+
+    # Gaps-and-islands: consecutive days share (day - row_number)
+    runs = _rows(
+        f"""
+        WITH days AS (
+            SELECT DISTINCT s.name AS habit, CAST(julianday(d.date) AS INTEGER) AS day
+            {where} AND d.completed = 1
+        )
+        SELECT habit, COUNT(*) AS len
+        FROM (
+            SELECT habit, day,
+                   day - ROW_NUMBER() OVER (PARTITION BY habit ORDER BY day) AS island
+            FROM days
+        )
+        GROUP BY habit, island
+        ORDER BY habit, MAX(day)
+        """,
+        params
+    )
+
+    out = {}
+    for habit, length in runs:
+        best = max(out[habit][1], length) if habit in out else length
+        out[habit] = (length, best)
+    return out
+
+
+# =====================================================
+# BEHAVIORAL INSIGHTS
+# =====================================================
+def fragile_habit(user_id, goal=None, sub_goal=None):
+    where, params = _scoped(user_id, goal, sub_goal)
+    rows = _rows(
+        f"SELECT s.name, AVG(d.completed) {where} GROUP BY s.name ORDER BY s.name",
+        params
+    )
+    if not rows:
+        return None
+    habit, rate = min(rows, key=lambda r: r[1])
+    return habit, int(rate * 100)
+
+
+def perfect_days(user_id, goal=None, sub_goal=None):
+    where, params = _scoped(user_id, goal, sub_goal)
+    perfect, total = _rows(
+        f"""
+        SELECT COALESCE(SUM(rate = 1), 0), COUNT(*)
+        FROM (SELECT AVG(d.completed) AS rate {where} GROUP BY d.date)
+        """,
+        params
+    )[0]
+    return perfect, total
+
+
+def consistency_trend(user_id, goal=None, sub_goal=None):
+    where, params = _scoped(user_id, goal, sub_goal)
+    n, sum_y, sum_xy = _rows(
+        f"""
+        SELECT COUNT(*), SUM(rate), SUM(x * rate)
+        FROM (
+            SELECT ROW_NUMBER() OVER (ORDER BY d.date) - 1 AS x,
+                   AVG(d.completed) AS rate
+            {where}
+            GROUP BY d.date
+        )
+        """,
+        params
+    )[0]
+    return trend_from_sums(n, sum_y or 0, sum_xy or 0)
+
+
+def weekday_pattern(user_id, goal=None, sub_goal=None):
+    where, params = _scoped(user_id, goal, sub_goal)
+    rows = _rows(
+        f"SELECT CAST(strftime('%w', d.date) AS INTEGER), AVG(d.completed) {where} "
+        "GROUP BY 1",
+        params
+    )
+    if len(rows) < 5:
+        return None
+
+    # Same tie-breaking as pandas idxmax/idxmin over day names
+    by_day = sorted((WEEKDAYS[day], rate) for day, rate in rows)
+    best = max(by_day, key=lambda r: r[1])[0]
+    worst = min(by_day, key=lambda r: r[1])[0]
+    return best, worst
+
+
+# =====================================================
+# PARITY CHECK
+# =====================================================
+PARITY_METRICS = [
+    "active_days",
+    "completion_rate",
+    "goal_contribution",
+    "goal_scores",
+    "habit_scores",
+    "habit_streaks",
+    "fragile_habit",
+    "perfect_days",
+    "consistency_trend",
+    "weekday_pattern",
+]
+
+
+def check_parity(user_ids=None):
+    """
+    Compare every metric against the pandas backend for each user and
+    every Focus scope. Returns a list of (user_id, scope, metric) that differ.
+    """
+    from progress import analytics
+
+    if user_ids is None:
+        user_ids = [r[0] for r in _rows("SELECT id FROM users", [])]
+
+    failures = []
+    for user_id in user_ids:
+        df = analytics.load_data(user_id)
+
+        scopes = [(None, None)]
+        for goal in goal_options(user_id):
+            scopes.append((goal, None))
+            scopes += [(goal, sub) for sub in sub_goal_options(user_id, goal)]
+
+        for goal, sub_goal in scopes:
+            frame = df
+            if goal is not None:
+                frame = frame[frame["goal"] == goal]
+            if sub_goal is not None:
+                frame = frame[frame["sub_goal"] == sub_goal]
+
+            for name in PARITY_METRICS:
+                expected = getattr(analytics, name)(frame)
+                actual = globals()[name](user_id, goal, sub_goal)
+                if expected != actual:
+                    failures.append((user_id, (goal, sub_goal), name))
+
+            expected = analytics.daily_completion(frame)
+            actual = daily_completion(user_id, goal, sub_goal)
+            if list(expected.itertuples(index=False)) != list(actual.itertuples(index=False)):
+                failures.append((user_id, (goal, sub_goal), "daily_completion"))
+
+    return failures
+
+
+if __name__ == "__main__":
+    users = [int(u) for u in sys.argv[1:]] or None
+    failures = check_parity(users)
+    for user_id, scope, name in failures:
+        print(f"user {user_id} {scope}: {name} differs")
+    print("SQL backend matches pandas" if not failures else f"{len(failures)} mismatches")
+    sys.exit(1 if failures else 0)
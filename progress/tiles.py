@@ -0,0 +1,124 @@
+"""
+Calendar tiles for the Consistency Map.
+
+A tile is one month of one Focus scope: a float32[31] of daily completion
+ratios (0 for days without logs, NaN past the end of the month). The
+heatmap is the user's tiles stacked in month order, so a rerun never
+re-pivots the history.
+
+Tiles live across snapshots. When the user's check-ins change, only the
+current month and months whose check-ins were committed since (see
+versions.touched) are reloaded, plus the previous month once the month
+changes; goal changes drop all of the user's tiles.
+"""
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from config import TILE_CACHE_USERS
+from progress.analytics import load_daily
+from utils.versions import current, touched
+
+
+def _blank(month):
+    tile = np.zeros(31, dtype=np.float32)
+    year, number = map(int, month.split("-"))
+    tile[calendar.monthrange(year, number)[1]:] = np.nan
+    return tile
+
+
+def month_tiles(daily):
+    """Split a load_daily() series into {'YYYY-MM': tile}."""
+    days = daily["date"].to_numpy().astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    day_of_month = (days - months).astype(np.int64)
+    values = daily["completed"].to_numpy(dtype=np.float32)
+
+    tiles = {}
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]]) if len(days) else []
+    for start, end in zip(starts, np.append(starts[1:], len(days))):
+        month = str(months[start])
+        tile = tiles[month] = _blank(month)
+        tile[day_of_month[start:end]] = values[start:end]
+    return tiles
+
+
+def stack(tiles):
+    """Heatmap frame: one row per month ('%b %Y', oldest first), days 1-31."""
+    months = sorted(tiles)
+    grid = np.vstack([tiles[m] for m in months]) if months else np.empty((0, 31))
+    return pd.DataFrame(
+        grid,
+        index=pd.Index(
+            [date.fromisoformat(m + "-01").strftime("%b %Y") for m in months], name="month"
+        ),
+        columns=pd.RangeIndex(1, 32, name="day"),
+    )
+
+
+# =====================================================
+# STORE
+# =====================================================
+class UserTiles:
+    def __init__(self, goals_version):
+        self.goals_version = goals_version
+        self.checkins_version = None
+        self.month = None
+        self.seen = {}          # touched() counters already accounted for
+        self.scopes = {}        # scope -> {month: tile}
+        self.stale = {}         # scope -> months to reload
+
+    def refresh(self, checkins_version, month, touches):
+        if checkins_version == self.checkins_version and month == self.month:
+            return
+
+        dirty = {month} | {m for m, n in touches.items() if self.seen.get(m) != n}
+        # The last month's final days were "today" when written, so never
+        # touched: reload that month too once the month changes.
+        if self.month is not None and month != self.month:
+            dirty.add(self.month)
+        for scope in self.scopes:
+            self.stale.setdefault(scope, set()).update(dirty)
+        self.checkins_version = checkins_version
+        self.month = month
+        self.seen = touches
+
+
+_lock = threading.Lock()
+_users = OrderedDict()
+
+
+def heatmap_grid(user_id, scope):
+    """The Consistency Map frame for a Focus scope, from cached month tiles."""
+    goals_version, checkins_version = current(user_id, "goals", "checkins")
+    month = date.today().isoformat()[:7]
+
+    with _lock:
+        entry = _users.get(user_id)
+        if entry is None or entry.goals_version != goals_version:
+            entry = _users[user_id] = UserTiles(goals_version)
+        _users.move_to_end(user_id)
+        while len(_users) > TILE_CACHE_USERS:
+            _users.popitem(last=False)
+
+        entry.refresh(checkins_version, month, touched(user_id))
+        tiles = entry.scopes.get(scope)
+        stale = entry.stale.pop(scope, set())
+
+    if tiles is None:
+        tiles = month_tiles(load_daily(user_id, *scope))
+    elif stale:
+        # Reload everything from the oldest stale month on.
+        since = min(stale)
+        tiles = {m: tile for m, tile in tiles.items() if m < since}
+        tiles.update(month_tiles(load_daily(user_id, *scope, since=since + "-01")))
+
+    with _lock:
+        if _users.get(user_id) is entry:
+            entry.scopes[scope] = tiles
+
+    return stack(tiles)
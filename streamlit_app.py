@@ -1,28 +1,51 @@
+import importlib
+
 import streamlit as st
-from database.schema import create_tables
-from auth.login import render as login
-from goals.goals_ui import render as goals
-from checkin.checkin_ui import render as checkin
-from progress.progress_ui import render as progress
-from todo.todo_ui import render as todo
-
-create_tables()
-
-st.set_page_config(layout="wide")
-
-if "user_id" not in st.session_state:
-    login()
-else:
-    page = st.sidebar.radio(
-    "Menu",
-    ["Goals", "Daily Check-in", "Progress", "To-Do"]
-)
-    if page == "Goals":
-        goals()
-    elif page == "Daily Check-in":
-        checkin()
-    elif page == "To-Do":
-        todo()
+from auth.credentials import rotate_token
+from database.schema import ensure_schema
+from utils.instrument import debug_panel, span
+from utils.session import logout
+
+# Page modules are imported the first time they are shown, so the login
+# page and the light pages never load pandas/numpy/plotly (Progress only).
+PAGES = {
+    "Goals": "goals.goals_ui",
+    "Daily Check-in": "checkin.checkin_ui",
+    "Progress": "progress.progress_ui",
+    "To-Do": "todo.todo_ui",
+}
+
+
+def render_page(module):
+    importlib.import_module(module).render()
+
+
+with span("rerun") as rerun:
+    ensure_schema()
+
+    st.set_page_config(layout="wide")
+
+    if "user_id" in st.session_state:
+        # An expired or revoked token ends the session.
+        token = rotate_token(st.session_state.get("token"))
+        if token is None:
+            logout()
+        else:
+            st.session_state.token = token
+
+    if "user_id" not in st.session_state:
+        with span("page:Login"):
+            render_page("auth.login")
     else:
-        progress()
+        page = st.sidebar.radio(
+        "Menu",
+        list(PAGES)
+    )
+        if st.sidebar.button("Logout"):
+            logout()
+            st.rerun()
+        with span(f"page:{page}"):
+            render_page(PAGES[page])
 
+if rerun is not None:
+    debug_panel(rerun.as_dict())
@@ -0,0 +1,36 @@
+import pytest
+
+from database.db import database_path, use_database
+from database.schema import create_tables
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh, migrated database for the test; the previous one afterwards."""
+    original = database_path()
+    use_database(str(tmp_path / "habits.db"))
+    create_tables()
+    yield
+    use_database(original)
+
+
+@pytest.fixture
+def user(db):
+    """(user_id, [sub_goal_id, sub_goal_id]) under one goal."""
+    from database.db import get_connection
+
+    with get_connection() as conn:
+        user_id = conn.execute(
+            "INSERT INTO users (username, password) VALUES ('test', 'x')"
+        ).lastrowid
+        goal_id = conn.execute(
+            "INSERT INTO goals (user_id, name) VALUES (?, 'Health')", (user_id,)
+        ).lastrowid
+        subs = [
+            conn.execute(
+                "INSERT INTO sub_goals (goal_id, name) VALUES (?, ?)", (goal_id, name)
+            ).lastrowid
+            for name in ("Walk", "Read")
+        ]
+        conn.commit()
+    return user_id, subs
@@ -0,0 +1,34 @@
+from datetime import date
+
+from auth import context
+from auth.context import UserContext
+from checkin.checkin_service import set_status
+
+
+def _unexpected(*args):
+    raise AssertionError("part reloaded without a write")
+
+
+def test_rerun_reads_versions_once(user, monkeypatch):
+    user_id, subs = user
+    ctx = UserContext(user_id).load()
+
+    reads = []
+    read = context.read
+    monkeypatch.setattr(context, "read", lambda uid: reads.append(uid) or read(uid))
+    for name in ("get_goals", "get_milestones", "get_statuses", "get_tasks_range"):
+        monkeypatch.setattr(context, name, _unexpected)
+
+    ctx.refresh()
+    ctx.goals, ctx.milestones, ctx.statuses, ctx.week
+    assert reads == [user_id]
+
+
+def test_write_reloads_affected_parts(user):
+    user_id, subs = user
+    ctx = UserContext(user_id).load()
+    assert ctx.statuses == {}
+
+    set_status(subs[0], date.today(), 1)
+    assert ctx.statuses == {}           # until the next refresh
+    assert ctx.refresh().statuses == {subs[0]: True}
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+import pytest
+
+from auth import credentials
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(credentials.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(credentials, "_tokens", OrderedDict())
+    monkeypatch.setattr(credentials, "_failures", OrderedDict())
+    return now
+
+
+def test_expired_tokens_are_dropped_from_the_front(clock):
+    old = credentials.issue_token(1)
+    clock[0] += 10
+    live = credentials.issue_token(2)
+    clock[0] += credentials.SESSION_TOKEN_TTL - 5
+
+    fresh = credentials.issue_token(3)
+
+    assert list(credentials._tokens) == [live, fresh]
+    assert credentials.resolve_token(old) is None
+    assert credentials.rotate_token(old) is None
+
+
+def test_rotate_replaces_the_token(clock):
+    token = credentials.issue_token(7)
+    rotated = credentials.rotate_token(token)
+
+    assert credentials.resolve_token(token) is None
+    assert credentials.resolve_token(rotated) == 7
+    credentials.revoke_token(rotated)
+    assert credentials.resolve_token(rotated) is None
+
+
+def test_failure_table_is_bounded(clock, monkeypatch):
+    monkeypatch.setattr(credentials, "LOGIN_TRACKED_USERNAMES", 2)
+    for name in ("a", "b", "c"):
+        credentials.record_failure(name)
+
+    assert list(credentials._failures) == ["b", "c"]
+    assert not credentials.login_locked("zz")
+    assert "zz" not in credentials._failures
@@ -0,0 +1,14 @@
+from collections import OrderedDict
+
+from progress import history
+
+
+def test_cache_keeps_only_recent_users(user, monkeypatch):
+    user_id, _ = user
+    monkeypatch.setattr(history, "_histories", OrderedDict())
+    monkeypatch.setattr(history, "HISTORY_CACHE_USERS", 2)
+
+    for other in (user_id + 1, user_id + 2, user_id):
+        history.get_history(other)
+
+    assert list(history._histories) == [user_id + 2, user_id]
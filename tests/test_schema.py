@@ -0,0 +1,21 @@
+import sqlite3
+
+from database.schema import _table_scans, check_plans
+
+
+def test_table_scans_see_through_aliases():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE daily_logs (sub_goal_id, date, completed)")
+    conn.execute("CREATE INDEX idx ON daily_logs (sub_goal_id)")
+
+    assert _table_scans(conn, "SELECT * FROM daily_logs d WHERE completed = 1") == ["SCAN d"]
+    assert _table_scans(conn, "SELECT * FROM daily_logs d WHERE sub_goal_id = 1") == []
+    assert _table_scans(
+        conn,
+        "WITH RECURSIVE days(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM days WHERE n < 3) "
+        "SELECT n FROM days"
+    ) == []
+
+
+def test_service_queries_use_indexes():
+    assert check_plans() == []
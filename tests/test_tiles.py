@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import pytest
+
+from checkin.checkin_service import set_status
+from progress import tiles
+from progress.analytics import load_daily
+
+OVERALL = (None, None)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    # Versions restart with every test database; so must the tile cache.
+    monkeypatch.setattr(tiles, "_users", OrderedDict())
+
+
+def _clock(monkeypatch, today):
+    class Today(date):
+        @classmethod
+        def today(cls):
+            return today
+
+    monkeypatch.setattr(tiles, "date", Today)
+
+
+def _ratio(grid, day):
+    return float(grid.loc[day.strftime("%b %Y"), day.day])
+
+
+def test_check_in_today_reloads_current_month(user, monkeypatch):
+    user_id, subs = user
+    today = date.today()
+    _clock(monkeypatch, today)
+    for sub_id in subs:
+        set_status(sub_id, today, 0)
+    assert _ratio(tiles.heatmap_grid(user_id, OVERALL), today) == 0.0
+
+    for sub_id in subs:
+        set_status(sub_id, today, 1)
+    assert _ratio(tiles.heatmap_grid(user_id, OVERALL), today) == 1.0
+
+
+def test_month_change_reloads_previous_month(user, monkeypatch):
+    # Check-ins written on a month's last day while it was still today
+    # never touch that month; the month change must reload it anyway.
+    user_id, subs = user
+    today = date.today()
+    _clock(monkeypatch, today)
+    for sub_id in subs:
+        set_status(sub_id, today, 0)
+    assert _ratio(tiles.heatmap_grid(user_id, OVERALL), today) == 0.0
+
+    for sub_id in subs:
+        set_status(sub_id, today, 1)
+    next_month = (today.replace(day=28) + timedelta(days=4)).replace(day=1)
+    _clock(monkeypatch, next_month)
+
+    grid = tiles.heatmap_grid(user_id, OVERALL)
+    assert float(load_daily(user_id).iloc[-1]["completed"]) == 1.0
+    assert _ratio(grid, today) == 1.0
@@ -0,0 +1,41 @@
+import logging
+import time
+from datetime import date
+
+from checkin.checkin_service import UPSERT_LOG, get_status
+from database import writer as writer_module
+from database.writer import WriteBehind
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_failed_flush_is_logged_kept_and_retried(user, monkeypatch, caplog):
+    user_id, subs = user
+    today = date.today().isoformat()
+    writer = WriteBehind(0.01, 0.05)
+
+    connect = writer_module.get_connection
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return connect()
+
+    monkeypatch.setattr(writer_module, "get_connection", flaky)
+    with caplog.at_level(logging.ERROR, logger="database.writer"):
+        writer.submit(("log", subs[0], today), UPSERT_LOG, (subs[0], today, 1),
+                      user_id, "checkins")
+        _wait_for(lambda: writer.stats()["batches"])
+
+    assert writer.stats()["failures"] == 1
+    assert writer.stats()["pending"] == 0
+    assert get_status(subs[0], today) == 1
+    assert "write-behind flush failed" in caplog.text
+    assert writer._thread.is_alive()
@@ -1,6 +1,11 @@
+from collections import namedtuple
+
+from config import WRITE_BEHIND
+from database import writer
 from database.db import get_connection
 from datetime import date, timedelta
 from database.db import get_connection
+from utils.dates import to_key
 
 
 
@@ -10,90 +15,194 @@ from datetime import date
 from database.db import get_connection
 
 
+def task_owner(conn, task_id):
+    row = conn.execute(
+        "SELECT user_id FROM todos WHERE id=?", (task_id,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+# Users already rolled over today in this process: {user_id: iso_day}
+_rolled_over = {}
+
+MARK_ROLLED = """
+    INSERT INTO todo_rollovers (user_id, rolled_on)
+    VALUES (?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET rolled_on = excluded.rolled_on
+"""
+
+
 def roll_over_unfinished_tasks(user_id):
     """
     Move all unfinished tasks with due_date < today to today.
-    Safe to run multiple times per day.
+    Runs at most once per user per day: later calls that day only check
+    the todo_rollovers marker (or nothing at all in the same process).
     """
 
-    conn = get_connection()
-    cur = conn.cursor()
-
     today = date.today().isoformat()
-
-    # Find unfinished tasks from ANY past date
-    cur.execute(
-        """
-        SELECT id
-        FROM todos
-        WHERE user_id = ?
-          AND completed = 0
-          AND due_date < ?
-        """,
-        (user_id, today)
-    )
-
-    task_ids = [row[0] for row in cur.fetchall()]
-
-    if not task_ids:
+    if _rolled_over.get(user_id) == today:
         return
 
-    # Move them to today
-    cur.executemany(
-        """
-        UPDATE todos
-        SET due_date = ?
-        WHERE id = ?
-        """,
-        [(today, tid) for tid in task_ids]
-    )
+    with get_connection() as conn:
+        marker = conn.execute(
+            "SELECT rolled_on FROM todo_rollovers WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+
+        if marker is None or marker[0] != today:
+            conn.execute(
+                """
+                UPDATE todos
+                SET due_date = ?
+                WHERE user_id = ?
+                  AND completed = 0
+                  AND due_date < ?
+                """,
+                (today, user_id, today)
+            )
+            conn.execute(MARK_ROLLED, (user_id, today))
+            conn.commit()
+
+    _rolled_over[user_id] = today
+
+
+def roll_over_all_users():
+    """
+    Nightly batch: roll over every user's unfinished tasks in one
+    transaction and mark them all as done for today.
+    Returns the number of tasks moved.
+    """
+
+    today = date.today().isoformat()
 
-    conn.commit()
+    with get_connection() as conn:
+        conn.execute("BEGIN")
+        moved = conn.execute(
+            """
+            UPDATE todos
+            SET due_date = ?
+            WHERE completed = 0
+              AND due_date < ?
+            """,
+            (today, today)
+        ).rowcount
+        conn.execute(
+            """
+            INSERT INTO todo_rollovers (user_id, rolled_on)
+            SELECT id, ? FROM users WHERE true
+            ON CONFLICT(user_id) DO UPDATE SET rolled_on = excluded.rolled_on
+            """,
+            (today,)
+        )
+        conn.commit()
+
+    return moved
 
 # -----------------------------
 # Fetch tasks
 # -----------------------------
+def _queued(user_id):
+    """Toggles still waiting in the write-behind queue: {task_id: completed}."""
+    if not WRITE_BEHIND:
+        return {}
+    return {
+        task_id: completed
+        for (task_id,), (completed, _) in writer.pending("task", user_id).items()
+    }
+
+
 def get_tasks(user_id, date):
-    conn = get_connection()
-    cur = conn.cursor()
-    return cur.execute("""
-        SELECT id, task, completed
-        FROM todos
-        WHERE user_id=? AND due_date=?
-        ORDER BY id
-    """, (user_id, date)).fetchall()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        rows = cur.execute("""
+            SELECT id, task, completed
+            FROM todos
+            WHERE user_id=? AND due_date=?
+            ORDER BY id
+        """, (user_id, date)).fetchall()
+
+    queued = _queued(user_id)
+    return [(t_id, task, queued.get(t_id, completed)) for t_id, task, completed in rows]
+
+
+DayTasks = namedtuple("DayTasks", "tasks done total")
+NO_TASKS = DayTasks((), 0, 0)
+
+
+def get_tasks_range(user_id, start, end):
+    """
+    Every task due from start to end (inclusive) in one indexed query,
+    grouped by day: {iso_day: DayTasks(tasks, done, total)}. Tasks are
+    (id, task, completed) as in get_tasks; days without tasks are absent.
+    """
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT due_date, id, task, completed,
+                   SUM(completed) OVER (PARTITION BY due_date),
+                   COUNT(*) OVER (PARTITION BY due_date)
+            FROM todos
+            WHERE user_id=? AND due_date BETWEEN ? AND ?
+            ORDER BY due_date, id
+        """, (user_id, to_key(start), to_key(end))).fetchall()
+
+    queued = _queued(user_id)
+    days = {}
+    for due, t_id, task, completed, done, total in rows:
+        if due not in days:
+            days[due] = ([], done, total)
+        if t_id in queued:
+            tasks, done, total = days[due]
+            days[due] = (tasks, done + queued[t_id] - completed, total)
+            completed = queued[t_id]
+        days[due][0].append((t_id, task, completed))
+
+    return {
+        due: DayTasks(tuple(tasks), done, total)
+        for due, (tasks, done, total) in days.items()
+    }
 
 
 # -----------------------------
 # Add task
 # -----------------------------
 def add_task(user_id, task, date):
-    conn = get_connection()
-    conn.execute("""
-        INSERT INTO todos (user_id, task, due_date)
-        VALUES (?, ?, ?)
-    """, (user_id, task, date))
-    conn.commit()
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO todos (user_id, task, due_date)
+            VALUES (?, ?, ?)
+        """, (user_id, task, date))
+        conn.commit()
 
 
 # -----------------------------
 # Toggle completion
 # -----------------------------
-def set_status(task_id, completed):
-    conn = get_connection()
-    conn.execute("""
-        UPDATE todos SET completed=?
-        WHERE id=?
-    """, (completed, task_id))
-    conn.commit()
+SET_TASK_STATUS = "UPDATE todos SET completed=? WHERE id=?"
+
+
+def set_status(task_id, completed, user_id=None):
+    if WRITE_BEHIND:
+        if user_id is None:
+            with get_connection() as conn:
+                user_id = task_owner(conn, task_id)
+        writer.submit(
+            ("task", task_id), SET_TASK_STATUS, (completed, task_id), user_id, "todos"
+        )
+        return
+
+    with get_connection() as conn:
+        conn.execute(SET_TASK_STATUS, (completed, task_id))
+        conn.commit()
 
 
 # -----------------------------
 # Delete task
 # -----------------------------
 def delete_task(task_id):
-    conn = get_connection()
-    conn.execute("DELETE FROM todos WHERE id=?", (task_id,))
-    conn.commit()
+    with get_connection() as conn:
+        conn.execute("DELETE FROM todos WHERE id=?", (task_id,))
+        conn.commit()
 
 
+if __name__ == "__main__":
+    print(f"Rolled over {roll_over_all_users()} unfinished tasks")
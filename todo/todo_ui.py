@@ -2,12 +2,12 @@ import streamlit as st
 from datetime import date, timedelta
 
 from todo.todo_service import (
-    get_tasks,
+    NO_TASKS,
     add_task,
     set_status,
     delete_task
 )
-from utils.session import require_login
+from utils.session import require_login, user_context
 
 
 def circular_progress(label, progress, size=70, thickness=8):
@@ -99,16 +99,12 @@ def render():
     today = date.today()
 
     # ----------------------------------------
-    # PRE-CALCULATE WEEKLY TOTALS (IMPORTANT)
+    # WHOLE WEEK (session context, one query on change)
     # ----------------------------------------
-    weekly_done = 0
-    weekly_total = 0
+    week = user_context().week
 
-    for i in range(7):
-        d = today + timedelta(days=i)
-        tasks = get_tasks(user_id, d.isoformat())
-        weekly_done += sum(t[2] for t in tasks)
-        weekly_total += len(tasks)
+    weekly_done = sum(day.done for day in week.values())
+    weekly_total = sum(day.total for day in week.values())
 
     weekly_progress = weekly_done / weekly_total if weekly_total else 0
 
@@ -129,16 +125,13 @@ def render():
         '''
 
     cols = st.columns(7)
-    weekly_done = 0
-    weekly_total = 0
-
 
 
     # --------------------------------
     # Instant checkbox update handler
     # --------------------------------
     def toggle(task_id, key):
-        set_status(task_id, int(st.session_state[key]))
+        set_status(task_id, int(st.session_state[key]), user_id)
 
     # =================================
     # 7-DAY GRID
@@ -159,12 +152,7 @@ def render():
         )
 
         with col:
-            tasks = get_tasks(user_id, current_day.isoformat())
-            done = sum(t[2] for t in tasks)
-            total = len(tasks)
-
-            weekly_done += done
-            weekly_total += total
+            tasks, done, total = week.get(current_day.isoformat(), NO_TASKS)
 
             progress = done / total if total else 0
 
@@ -2,3 +2,12 @@ import datetime
 
 def today():
     return datetime.date.today().isoformat()
+
+
+def to_key(day):
+    """Normalize a date/datetime/ISO string to the 'YYYY-MM-DD' key stored in the DB."""
+    if isinstance(day, datetime.datetime):
+        day = day.date()
+    if isinstance(day, datetime.date):
+        return day.isoformat()
+    return str(day)[:10]
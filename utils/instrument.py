@@ -0,0 +1,233 @@
+"""
+Opt-in timing of the hot paths behind one Streamlit rerun.
+
+Enabled by config.INSTRUMENT or HABITS_INSTRUMENT=1. When on, pooled
+connections are TimedConnections (every execute/executemany/commit and
+the rows fetched are counted), page renders run inside a span() and
+@timed functions record their calls into the current span. Finished
+spans go to the sidebar panel and, if INSTRUMENT_LOG or
+HABITS_INSTRUMENT_LOG names a file, are appended to it as JSON lines.
+
+When off, the pool uses plain sqlite3 connections, @timed returns the
+function unchanged and span() is a no-op context.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+from config import INSTRUMENT, INSTRUMENT_LOG
+
+ENABLED = INSTRUMENT or os.environ.get("HABITS_INSTRUMENT") == "1"
+LOG_PATH = os.environ.get("HABITS_INSTRUMENT_LOG") or INSTRUMENT_LOG
+
+_local = threading.local()
+_sink_lock = threading.Lock()
+recent = deque(maxlen=50)
+
+
+# =====================================================
+# SPANS
+# =====================================================
+class Span:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.ms = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.commits = 0
+        self.query_ms = 0.0
+        self.calls = {}             # name -> [count, ms, queries]
+
+    def add_call(self, name, ms, queries):
+        call = self.calls.setdefault(name, [0, 0.0, 0])
+        call[0] += 1
+        call[1] += ms
+        call[2] += queries
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "started": round(self.started, 3),
+            "ms": round(self.ms, 2),
+            "queries": self.queries,
+            "rows": self.rows,
+            "commits": self.commits,
+            "query_ms": round(self.query_ms, 2),
+            "calls": {
+                name: {"count": c, "ms": round(ms, 2), "queries": q}
+                for name, (c, ms, q) in sorted(self.calls.items(), key=lambda i: -i[1][1])
+            },
+        }
+
+
+def current_span():
+    return getattr(_local, "span", None)
+
+
+@contextmanager
+def _span(name):
+    outer = current_span()
+    if outer is not None:
+        # Nested page/section spans are recorded as calls of the rerun.
+        with _timed_call(outer, name):
+            yield outer
+        return
+
+    span = _local.span = Span(name)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span.ms = (time.perf_counter() - start) * 1000
+        _local.span = None
+        _emit(span)
+
+
+def span(name):
+    """Time a rerun (or a section of one); no-op when disabled."""
+    return _span(name) if ENABLED else nullcontext()
+
+
+@contextmanager
+def _timed_call(span, name):
+    queries = span.queries
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span.add_call(name, (time.perf_counter() - start) * 1000, span.queries - queries)
+
+
+def timed(func):
+    """Record calls of func into the current span; identity when disabled."""
+    if not ENABLED:
+        return func
+
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    def wrapper(*args, **kwargs):
+        span = current_span()
+        if span is None:
+            return func(*args, **kwargs)
+        with _timed_call(span, name):
+            return func(*args, **kwargs)
+
+    wrapper.__name__ = func.__name__
+    wrapper.__qualname__ = func.__qualname__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _emit(span):
+    record = span.as_dict()
+    recent.append(record)
+    if LOG_PATH:
+        line = json.dumps(record)
+        with _sink_lock, open(LOG_PATH, "a") as f:
+            f.write(line + "\n")
+
+
+# =====================================================
+# TIMED CONNECTIONS
+# =====================================================
+class TimedCursor(sqlite3.Cursor):
+    def _time(self, method, *args):
+        span = current_span()
+        if span is None:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            span.query_ms += (time.perf_counter() - start) * 1000
+
+    def _count(self, rows):
+        span = current_span()
+        if span is not None:
+            span.rows += rows
+
+    def execute(self, sql, parameters=()):
+        span = current_span()
+        if span is not None:
+            span.queries += 1
+        return self._time(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        span = current_span()
+        if span is not None:
+            span.queries += 1
+        return self._time(super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        row = self._time(super().fetchone)
+        self._count(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._time(super().fetchmany, size or self.arraysize)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._time(super().fetchall)
+        self._count(len(rows))
+        return rows
+
+    def __next__(self):
+        row = self._time(super().__next__)
+        self._count(1)
+        return row
+
+
+class TimedConnection(sqlite3.Connection):
+    # sqlite3.Connection.execute* build their cursor in C without going
+    # through cursor(), so they are re-routed here to be counted.
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        span = current_span()
+        if span is None:
+            return super().commit()
+        span.commits += 1
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            span.query_ms += (time.perf_counter() - start) * 1000
+
+
+def connection_factory():
+    return TimedConnection if ENABLED else sqlite3.Connection
+
+
+# =====================================================
+# DEBUG PANEL
+# =====================================================
+def debug_panel(record):
+    """Sidebar summary of one finished span (record = Span.as_dict())."""
+    import streamlit as st
+
+    with st.sidebar.expander("Debug: last rerun", expanded=False):
+        st.caption(
+            f"{record['name']} · {record['ms']:.1f} ms · "
+            f"{record['queries']} queries ({record['query_ms']:.1f} ms) · "
+            f"{record['rows']} rows · {record['commits']} commits"
+        )
+        if record["calls"]:
+            st.dataframe(
+                [{"call": name, **call} for name, call in record["calls"].items()],
+                hide_index=True
+            )
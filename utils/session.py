@@ -3,3 +3,27 @@ import streamlit as st
 def require_login():
     if "user_id" not in st.session_state:
         st.stop()
+
+
+def logout():
+    """Revoke the session's token and forget the signed-in user."""
+    from auth.credentials import revoke_token
+
+    revoke_token(st.session_state.get("token"))
+    for key in ("user_id", "token", "ctx"):
+        st.session_state.pop(key, None)
+
+
+def user_context():
+    """
+    The session's UserContext, built (and fully loaded) on first use and
+    refreshed on every later call. Pages call it once per rerun, after
+    any writes they make before reading it.
+    """
+    from auth.context import UserContext
+
+    ctx = st.session_state.get("ctx")
+    if ctx is None or ctx.user_id != st.session_state.user_id:
+        ctx = st.session_state.ctx = UserContext(st.session_state.user_id).load()
+        return ctx
+    return ctx.refresh()
@@ -0,0 +1,59 @@
+import threading
+from collections import defaultdict
+
+from database.db import get_connection
+
+# -------------------------------------------------
+# Per-user data versions
+# -------------------------------------------------
+# Triggers (schema migration 7) count every committed write per user and
+# domain ("goals", "checkins", "todos") in user_versions, whichever
+# process made it. read() fetches that row with one primary-key lookup
+# and adds this process's own counters, which writer.submit() bumps for
+# toggles not yet committed (the services overlay those on their reads).
+# Caches key their entries on these versions, so any write makes the old
+# entries unreachable; current() picks out a few domains.
+DOMAINS = ("goals", "checkins", "todos")
+
+_lock = threading.Lock()
+_versions = defaultdict(int)
+
+
+def bump(user_id, *domains):
+    if user_id is None:
+        return
+    with _lock:
+        for domain in domains:
+            _versions[(user_id, domain)] += 1
+
+
+def read(user_id):
+    """{domain: version} for every domain, from one primary-key lookup."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT goals, checkins, todos FROM user_versions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+    committed = dict(zip(DOMAINS, row or (0,) * len(DOMAINS)))
+    # Both parts only ever grow, so their sum changes with every write.
+    with _lock:
+        return {domain: committed[domain] + _versions[(user_id, domain)] for domain in DOMAINS}
+
+
+def current(user_id, *domains):
+    versions = read(user_id)
+    return tuple(versions[domain] for domain in domains)
+
+
+# -------------------------------------------------
+# Touched check-in months
+# -------------------------------------------------
+# Per user, a counter per 'YYYY-MM' (checkin_months, also trigger-kept)
+# that moves whenever check-ins for a day before today in that month are
+# committed, so caches of past days (calendar tiles, the Progress
+# History) can tell which months need reloading. Today and later are
+# re-read by those caches anyway.
+def touched(user_id):
+    with get_connection() as conn:
+        return dict(conn.execute(
+            "SELECT month, version FROM checkin_months WHERE user_id = ?", (user_id,)
+        ))